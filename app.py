@@ -1,23 +1,17 @@
+import os
+import shutil
+import tempfile
+import time
 import streamlit as st
-import spacy
-from spacy import displacy
-from sumy.parsers.plaintext import PlaintextParser
-from sumy.nlp.tokenizers import Tokenizer
-from sumy.summarizers.lsa import LsaSummarizer
-from sumy.summarizers.lex_rank import LexRankSummarizer
-from sumy.summarizers.luhn import LuhnSummarizer
-from sumy.summarizers.text_rank import TextRankSummarizer
-from sumy.nlp.stemmers import Stemmer
-from sumy.utils import get_stop_words
-import pandas as pd
-from collections import Counter
-import matplotlib.pyplot as plt
-import networkx as nx
-from wordcloud import WordCloud
-import json
-from textblob import TextBlob
-import requests
-from bs4 import BeautifulSoup
+
+from omnitext.analysis import AnalyzedText, top_items
+from omnitext.batch import iter_documents, open_writer, run_batch
+from omnitext.cache import ResultCache
+from omnitext.fetch import Fetcher, FetchError
+from omnitext.metrics import METRICS, configure_from_env, peak_rss
+from omnitext.pipelines import ModelNotInstalled, get_pipeline, profile_for
+from omnitext.render import PAGE_CHARS, bar_chart, entity_html, entity_pages, word_cloud
+from omnitext.stages import StageRun, make_executor
 
 
 # Set page configuration
@@ -28,19 +22,77 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Load spaCy model
-# Load spaCy model - THIS IS THE CORRECT VERSION
+# Load the smallest spaCy pipeline for the chosen analysis: NER needs the
+# model, summaries and word counts only need the tokenizer and sentencizer.
+# The model is installed ahead of time (setup.sh or `omnitext setup`).
 @st.cache_resource
-def load_model():
+def load_model(profile):
+    return get_pipeline(profile)
+
+def pipeline_or_stop(profile):
     try:
-        nlp = spacy.load("en_core_web_sm")
-    except OSError:
-        from spacy.cli import download
-        download("en_core_web_sm")
-        nlp = spacy.load("en_core_web_sm")
-    return nlp
+        return load_model(profile)
+    except ModelNotInstalled as e:
+        st.error(str(e))
+        st.stop()
+
+# Stage timings also go to JSON logs, a Prometheus file and/or a /metrics
+# endpoint when OMNITEXT_METRICS_LOG, _FILE or _PORT are set
+@st.cache_resource
+def setup_metrics():
+    return configure_from_env()
+
+setup_metrics()
+
+# Results cache shared across reruns and sessions; set OMNITEXT_CACHE_DIR
+# to also keep results on disk where other worker processes can reuse them
+@st.cache_resource
+def load_cache():
+    return ResultCache(
+        maxsize=int(os.environ.get("OMNITEXT_CACHE_SIZE", 256)),
+        ttl=int(os.environ.get("OMNITEXT_CACHE_TTL", 24 * 60 * 60)),
+        directory=os.environ.get("OMNITEXT_CACHE_DIR"),
+    )
+
+cache = load_cache()
+
+# One pooled HTTP session per server; pages are revalidated against an
+# on-disk cache (OMNITEXT_HTTP_CACHE_DIR) instead of downloaded again
+@st.cache_resource
+def load_fetcher():
+    return Fetcher(
+        cache_dir=os.environ.get("OMNITEXT_HTTP_CACHE_DIR",
+                                 os.path.join(tempfile.gettempdir(), "omnitext-http")),
+        max_bytes=int(os.environ.get("OMNITEXT_MAX_DOWNLOAD_BYTES", 5 * 1024 * 1024)),
+    )
+
+# Reruns of the script reuse the extracted text without touching the network
+@st.cache_data(ttl=600, show_spinner="Fetching URL...")
+def fetch_url_text(url):
+    return load_fetcher().fetch_text(url)
+
+# Analysis stages of every session share one bounded thread pool
+@st.cache_resource
+def load_executor():
+    return make_executor(int(os.environ.get("OMNITEXT_STAGE_WORKERS", 8)))
+
+# Streamlit keeps a download's bytes in server memory, so batch results
+# larger than this (OMNITEXT_BATCH_DOWNLOAD_BYTES) are left on disk instead
+BATCH_DOWNLOAD_BYTES = int(os.environ.get("OMNITEXT_BATCH_DOWNLOAD_BYTES", 50 * 1024 * 1024))
 
-nlp = load_model()
+def get_entity_pages(text):
+    return cache.get_or_compute("entity_pages", text, lambda: entity_pages(text), page_chars=PAGE_CHARS)
+
+# Long documents are highlighted a page at a time; turning the page only
+# reruns this fragment, not the whole analysis
+@st.fragment
+def show_entity_pages(text, spans):
+    pages = get_entity_pages(text)
+    page = 1
+    if len(pages) > 1:
+        page = st.number_input(f"Page (of {len(pages)}):", 1, len(pages), 1, key="entity_page")
+    start, end = pages[page - 1]
+    st.markdown(entity_html(text, spans, start, end, cache=cache), unsafe_allow_html=True)
 
 # Custom CSS for styling
 st.markdown("""
@@ -116,156 +168,243 @@ with st.sidebar:
     st.subheader("Additional Options")
     show_wordcloud = st.checkbox("Show Word Cloud", value=True)
     show_sentiment = st.checkbox("Show Sentiment Analysis", value=True)
+    show_performance = st.checkbox("Show performance panel", value=False)
     
     st.markdown("---")
     st.info("This tool uses spaCy for NER and sumy for text summarization. You can analyze your text or extract content from a URL.")
 
 # Input options
-input_method = st.radio("Choose input method:", ["Enter text", "URL"])
+input_method = st.radio("Choose input method:", ["Enter text", "URL", "Batch corpus"])
 
 text = ""
 if input_method == "Enter text":
     text = st.text_area("Paste your text here:", height=200, 
                        placeholder="Enter or paste your text here...")
+elif input_method == "Batch corpus":
+    uploaded = st.file_uploader("Upload a CSV, JSONL or ZIP of documents:",
+                                type=["csv", "jsonl", "zip", "txt"])
+    folder = st.text_input("...or a folder of files on the server:", placeholder="/data/articles")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        text_field = st.text_input("Text column/field:", value="text")
+    with col2:
+        batch_size = st.number_input("spaCy batch size:", 1, 1024, 64)
+    with col3:
+        n_process = st.number_input("spaCy processes:", 1, os.cpu_count() or 1, 1)
+    with col4:
+        output_format = st.selectbox("Output format:", ["jsonl", "parquet"])
+
+    source = uploaded or folder
+    if st.button("Run Batch") and source:
+        def documents():
+            if uploaded:
+                uploaded.seek(0)
+            return iter_documents(source, text_field=text_field)
+
+        # Counting is a cheap pass over the input and lets us show real progress
+        total = sum(1 for _ in documents())
+        progress_bar = st.progress(0.0, text=f"0 / {total} documents")
+        # Results kept on disk by this session's previous run are replaced
+        old_dir = st.session_state.pop("batch_output_dir", None)
+        if old_dir:
+            shutil.rmtree(old_dir, ignore_errors=True)
+        output_dir = tempfile.mkdtemp(prefix="omnitext-")
+        output_path = os.path.join(output_dir, f"results.{output_format}")
+        try:
+            writer = open_writer(output_path, output_format)
+            try:
+                count = run_batch(
+                    documents(), pipeline_or_stop("ner"), writer,
+                    summarizer_type=summarizer_type if analysis_type != "Named Entity Recognition" else None,
+                    sentences_count=summary_ratio if analysis_type != "Named Entity Recognition" else 0,
+                    entity_types=entity_types if analysis_type != "Text Summarization" else None,
+                    batch_size=int(batch_size),
+                    n_process=int(n_process),
+                    progress=lambda n: progress_bar.progress(n / max(total, 1), text=f"{n} / {total} documents"),
+                )
+            finally:
+                writer.close()
+        except BaseException:
+            # Also on st.stop() and reruns, which don't derive from Exception
+            shutil.rmtree(output_dir, ignore_errors=True)
+            raise
+        size = os.path.getsize(output_path)
+        if size <= BATCH_DOWNLOAD_BYTES:
+            with open(output_path, "rb") as f:
+                data = f.read()
+            shutil.rmtree(output_dir, ignore_errors=True)
+            st.success(f"Analyzed {count} documents.")
+            st.download_button("Download results", data, file_name=os.path.basename(output_path))
+        else:
+            st.session_state["batch_output_dir"] = output_dir
+            st.success(f"Analyzed {count} documents. Results written to {output_path}")
+            st.info(f"The results are {size / 1024 / 1024:.0f} MB, too large to download here. "
+                    "Copy them from the server before the next batch run, which replaces them, "
+                    "or use `omnitext batch` for large corpora.")
 else:
     url = st.text_input("Enter URL:", placeholder="https://example.com")
     if url:
         try:
-            response = requests.get(url)
-            soup = BeautifulSoup(response.text, 'html.parser')
-            paragraphs = soup.find_all('p')
-            text = ' '.join([p.get_text() for p in paragraphs])
+            text = fetch_url_text(url)
             st.success("Text extracted successfully from URL!")
-        except:
-            st.error("Error extracting text from URL. Please check the URL and try again.")
+        except FetchError as e:
+            st.error(f"Error extracting text from URL ({e}). Please check the URL and try again.")
 
 # Process the text when the button is clicked
-if st.button("Analyze Text") and text:
-    with st.spinner("Analyzing text..."):
+if input_method != "Batch corpus" and st.button("Analyze Text") and text:
+    find_entities = analysis_type != "Text Summarization"
+    keep_sentences = analysis_type != "Named Entity Recognition"
+    nlp = pipeline_or_stop(profile_for(entities=find_entities, sentences=keep_sentences))
+    status = st.empty()
+    # Changing the input mid-run stops this script at the next Streamlit call,
+    # even while the panels are still being laid out, which cancels the
+    # stages that haven't finished
+    with StageRun(executor=load_executor()) as run:
+        # Parse once; every stage below reuses this analysis or its cached results
+        analyzed = AnalyzedText(nlp, text, cache=cache, keep_sentences=keep_sentences,
+                                find_entities=find_entities, cancel=run.cancelled)
+        # The parse (or the cache lookups that replace it) runs on one thread and
+        # the panels are started when it's done, instead of all waiting on it
+        run.submit("parse", analyzed.load)
+
+        # Every panel gets a placeholder up front and is filled in as soon as its
+        # stage finishes, so quick results don't wait for the slowest one
+        slots = {}
+        panels = {}
+
+        def add_panel(name, compute, show, slot, after="parse"):
+            slot.caption("⏳ Working...")
+            slots[name] = slot
+            panels[name] = show
+            run.submit(name, compute, after=after)
+
         # Perform NER
         if analysis_type in ["Named Entity Recognition", "Both"]:
-            doc = nlp(text)
-            
+            def compute_entity_html():
+                # Warm the cache for the first page; the fragment reads it back
+                spans = analyzed.entity_spans
+                start, end = get_entity_pages(text)[0]
+                entity_html(text, spans, start, end, cache=cache)
+                return spans
+
+            def compute_entity_chart():
+                entity_freq = analyzed.entity_counts(entity_types)
+                if entity_freq:
+                    return bar_chart(top_items(entity_freq), "Top Entity Frequency", cache=cache)
+
+            def show_entity_chart(png):
+                if png:
+                    st.image(png)
+                else:
+                    st.info("No entities found with selected types.")
+
             # Display NER visualization
             st.markdown("---")
             st.markdown('<div class="highlight">', unsafe_allow_html=True)
             st.subheader("🔍 Named Entity Recognition")
-            
+        
             # Create two columns for different visualizations
             col1, col2 = st.columns(2)
-            
-            with col1:
-                # HTML rendering of entities
-                html = displacy.render(doc, style="ent", page=True)
-                st.markdown(html, unsafe_allow_html=True)
-            
-            with col2:
-                # Entity frequency chart
-                entities = [ent.text for ent in doc.ents if ent.label_ in entity_types]
-                if entities:
-                    entity_freq = Counter(entities)
-                    top_entities = dict(sorted(entity_freq.items(), key=lambda x: x[1], reverse=True)[:10])
-                    
-                    fig, ax = plt.subplots()
-                    ax.barh(list(top_entities.keys()), list(top_entities.values()))
-                    ax.set_xlabel('Frequency')
-                    ax.set_title('Top Entity Frequency')
-                    plt.tight_layout()
-                    st.pyplot(fig)
-                else:
-                    st.info("No entities found with selected types.")
-            
+            # HTML rendering of entities, one page at a time
+            add_panel("entity_html", compute_entity_html, lambda spans: show_entity_pages(text, spans), col1.empty())
+            # Entity frequency chart
+            add_panel("entity_chart", compute_entity_chart, show_entity_chart, col2.empty())
             st.markdown('</div>', unsafe_allow_html=True)
-        
+    
         # Perform text summarization
         if analysis_type in ["Text Summarization", "Both"]:
+            def show_summary(summary):
+                # Display summary
+                st.markdown('<div class="summary-box">', unsafe_allow_html=True)
+                st.write(summary)
+                st.markdown('</div>', unsafe_allow_html=True)
+            
+                # Show original and summary statistics
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.info(f"Original text: {len(text.split())} words")
+                with col2:
+                    st.success(f"Summary: {len(summary.split())} words")
+
             st.markdown("---")
             st.markdown('<div class="highlight">', unsafe_allow_html=True)
             st.subheader("📃 Text Summarization")
-            
-            # Initialize the summarizer based on selection
-            parser = PlaintextParser.from_string(text, Tokenizer("english"))
-            stemmer = Stemmer("english")
-            
-            if summarizer_type == "LSA":
-                summarizer = LsaSummarizer(stemmer)
-            elif summarizer_type == "LexRank":
-                summarizer = LexRankSummarizer(stemmer)
-            elif summarizer_type == "Luhn":
-                summarizer = LuhnSummarizer(stemmer)
-            else:  # TextRank
-                summarizer = TextRankSummarizer(stemmer)
-            
-            summarizer.stop_words = get_stop_words("english")
-            
-            # Generate summary
-            summary_sentences = summarizer(parser.document, summary_ratio)
-            summary = " ".join(str(sentence) for sentence in summary_sentences)
-            
-            # Display summary
-            st.markdown('<div class="summary-box">', unsafe_allow_html=True)
-            st.write(summary)
-            st.markdown('</div>', unsafe_allow_html=True)
-            
-            # Show original and summary statistics
-            col1, col2 = st.columns(2)
-            with col1:
-                st.info(f"Original text: {len(text.split())} words")
-            with col2:
-                st.success(f"Summary: {len(summary.split())} words")
-            
+            # Generate summary from the spaCy sentences
+            add_panel("summary", lambda: analyzed.summarize(summarizer_type, summary_ratio), show_summary, st.empty())
             st.markdown('</div>', unsafe_allow_html=True)
-        
+    
         # Additional visualizations
         if show_wordcloud or show_sentiment:
             st.markdown("---")
             st.subheader("📊 Additional Insights")
-            
+        
             if show_wordcloud:
+                def show_wordcloud_image(png):
+                    if png:
+                        st.image(png, caption="Word Cloud")
+                    else:
+                        st.info("No words to show in a word cloud.")
+
                 col1, col2 = st.columns(2)
-                
-                with col1:
-                    # Generate word cloud
-                    wordcloud = WordCloud(width=800, height=400, background_color='white').generate(text)
-                    fig, ax = plt.subplots(figsize=(10, 5))
-                    ax.imshow(wordcloud, interpolation='bilinear')
-                    ax.axis('off')
-                    ax.set_title('Word Cloud')
-                    st.pyplot(fig)
-                
-                with col2:
-                    # Generate word frequency
-                    words = [token.text for token in nlp(text) if not token.is_stop and token.is_alpha]
-                    word_freq = Counter(words)
-                    top_words = dict(sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:10])
-                    
-                    fig, ax = plt.subplots()
-                    ax.barh(list(top_words.keys()), list(top_words.values()))
-                    ax.set_xlabel('Frequency')
-                    ax.set_title('Top Words (excluding stop words)')
-                    plt.tight_layout()
-                    st.pyplot(fig)
-            
+                # Word cloud from the word counts the analysis already has
+                add_panel("wordcloud", lambda: word_cloud(analyzed.word_counts(), cache=cache),
+                          show_wordcloud_image, col1.empty())
+                # Generate word frequency
+                add_panel("top_words",
+                          lambda: bar_chart(top_items(analyzed.word_counts()), "Top Words (excluding stop words)", cache=cache),
+                          st.image, col2.empty())
+        
             if show_sentiment:
-                # Perform sentiment analysis
-                blob = TextBlob(text)
-                sentiment = blob.sentiment
-                
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("Polarity", f"{sentiment.polarity:.2f}", 
-                              help="Polarity: -1 (negative) to +1 (positive)")
-                with col2:
-                    st.metric("Subjectivity", f"{sentiment.subjectivity:.2f}", 
-                              help="Subjectivity: 0 (objective) to 1 (subjective)")
-                with col3:
-                    if sentiment.polarity > 0.1:
-                        sentiment_label = "Positive"
-                    elif sentiment.polarity < -0.1:
-                        sentiment_label = "Negative"
-                    else:
-                        sentiment_label = "Neutral"
-                    st.metric("Overall Sentiment", sentiment_label)
+                def show_sentiment_metrics(sentiment):
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric("Polarity", f"{sentiment.polarity:.2f}", 
+                                  help="Polarity: -1 (negative) to +1 (positive)")
+                    with col2:
+                        st.metric("Subjectivity", f"{sentiment.subjectivity:.2f}", 
+                                  help="Subjectivity: 0 (objective) to 1 (subjective)")
+                    with col3:
+                        if sentiment.polarity > 0.1:
+                            sentiment_label = "Positive"
+                        elif sentiment.polarity < -0.1:
+                            sentiment_label = "Negative"
+                        else:
+                            sentiment_label = "Neutral"
+                        st.metric("Overall Sentiment", sentiment_label)
+
+                # Perform sentiment analysis; it reads the text itself, so it doesn't wait for the parse
+                add_panel("sentiment", lambda: analyzed.sentiment, show_sentiment_metrics, st.empty(), after=None)
+
+        started = time.monotonic()
+
+        def show_progress(done, total):
+            status.caption(f"⏳ Analyzing text... {done} of {total} stages done ({time.monotonic() - started:.1f} s)")
+
+        for name, result, error in run.results(on_wait=show_progress):
+            if name not in slots:
+                # A failed parse is reported by every panel that needed it
+                continue
+            with slots[name].container():
+                if error is not None:
+                    st.error(f"This analysis failed: {error}")
+                else:
+                    panels[name](result)
+    status.empty()
+    METRICS.write_prometheus()
+
+# Performance panel, drawn last so it includes the analysis above
+if show_performance:
+    with st.sidebar:
+        st.subheader("Performance")
+        st.caption("Time and memory per stage in this server process since it started.")
+        rows = METRICS.snapshot()
+        if rows:
+            st.dataframe(rows, hide_index=True)
+        else:
+            st.caption("Nothing has been measured yet.")
+        rss = peak_rss()
+        if rss:
+            st.metric("Peak memory (RSS)", f"{rss / 2 ** 20:.0f} MB")
 
 # Footer
 st.markdown("---")
@@ -0,0 +1,28 @@
+"""Throughput and peak memory of each analysis type, parse included."""
+import pytest
+
+import workloads
+from omnitext.pipelines import PROFILES, ModelNotInstalled, load_pipeline
+
+
+def _pipeline(analysis, model):
+    try:
+        return workloads.pipeline_for(analysis, model)
+    except ModelNotInstalled as e:
+        pytest.skip(str(e))
+
+
+@pytest.mark.parametrize("analysis", workloads.ANALYSES)
+def bench_analysis(measure, corpus, analysis, model):
+    nlp = _pipeline(analysis, model)
+    measure(lambda: workloads.analyze(corpus.text, analysis, nlp), corpus, "analysis", analysis)
+
+
+@pytest.mark.parametrize("profile", PROFILES)
+def bench_model_load(benchmark, profile, model):
+    try:
+        load_pipeline(profile, model)
+    except ModelNotInstalled as e:
+        pytest.skip(str(e))
+    benchmark.group = "model-load"
+    benchmark.pedantic(load_pipeline, (profile, model), rounds=3, iterations=1)
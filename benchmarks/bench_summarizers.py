@@ -0,0 +1,25 @@
+"""Throughput and peak memory of each summarizer on already parsed sentences."""
+from functools import lru_cache
+
+import pytest
+
+import workloads
+
+
+# LexRank and TextRank compare every pair of sentences; on the benchmark
+# corpora 10-20% of pairs share a term, so past this many sentences the
+# similarity graph alone needs gigabytes
+MAX_GRAPH_SENTENCES = 20_000
+
+
+@lru_cache(maxsize=2)
+def _sentences(kind, size_name, text):
+    return workloads.parse_sentences(text)
+
+
+@pytest.mark.parametrize("summarizer", workloads.SUMMARIZERS)
+def bench_summarizer(measure, corpus, summarizer):
+    sentences = _sentences(corpus.kind, corpus.size_name, corpus.text)
+    if summarizer in ("LexRank", "TextRank") and len(sentences) > MAX_GRAPH_SENTENCES:
+        pytest.skip(f"{len(sentences)} sentences is too many for a sentence graph")
+    measure(lambda: workloads.summarize(sentences, summarizer), corpus, "summarizer", summarizer)
@@ -0,0 +1,95 @@
+from functools import lru_cache
+
+import pytest
+
+import corpora
+import rss
+from omnitext.metrics import METRICS
+from omnitext.pipelines import DEFAULT_MODEL
+
+
+# Timed rounds per corpus size; large corpora are run once
+ROUNDS = {"1KB": 20, "100KB": 5, "1MB": 3, "10MB": 1}
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("omnitext")
+    group.addoption("--corpus-sizes", default="1KB,100KB,1MB",
+                    help=f"comma separated corpus sizes to run, from {','.join(corpora.SIZES)}")
+    group.addoption("--corpus-kinds", default=",".join(corpora.KINDS),
+                    help="comma separated corpus kinds (synthetic, fixture)")
+    group.addoption("--model", default=DEFAULT_MODEL, help="spaCy model for entity benchmarks")
+    group.addoption("--skip-rss", action="store_true", help="don't measure peak RSS in a worker process")
+
+
+def _option_list(config, name, allowed):
+    values = [value.strip() for value in config.getoption(name).split(",") if value.strip()]
+    unknown = set(values) - set(allowed)
+    if unknown:
+        raise pytest.UsageError(f"unknown {name} values: {', '.join(sorted(unknown))}")
+    return values
+
+
+def pytest_generate_tests(metafunc):
+    if "corpus" in metafunc.fixturenames:
+        config = metafunc.config
+        params = [
+            (kind, size_name)
+            for size_name in _option_list(config, "--corpus-sizes", corpora.SIZES)
+            for kind in _option_list(config, "--corpus-kinds", corpora.KINDS)
+        ]
+        metafunc.parametrize("corpus", params, ids=[f"{k}-{s}" for k, s in params], indirect=True)
+
+
+class Corpus:
+    def __init__(self, kind, size_name):
+        self.kind = kind
+        self.size_name = size_name
+        self.text = _load(kind, size_name)
+
+    @property
+    def bytes(self):
+        return len(self.text.encode("utf-8"))
+
+
+@lru_cache(maxsize=None)
+def _load(kind, size_name):
+    return corpora.load(kind, size_name)
+
+
+@pytest.fixture
+def corpus(request):
+    return Corpus(*request.param)
+
+
+@pytest.fixture
+def model(request):
+    return request.config.getoption("--model")
+
+
+@pytest.fixture
+def measure(benchmark, request, model):
+    """Time ``func`` on a corpus and record throughput and peak RSS with the results."""
+    def run(func, corpus, workload, option):
+        benchmark.group = f"{workload}-{corpus.kind}-{corpus.size_name}"
+        METRICS.clear()
+        rounds = ROUNDS[corpus.size_name]
+        # A warmup round keeps lazy imports out of the timings where it's affordable
+        result = benchmark.pedantic(func, rounds=rounds, iterations=1, warmup_rounds=1 if rounds > 1 else 0)
+        info = benchmark.extra_info
+        # Where the time went, from the same instrumentation the app reports
+        info["stages_mean_s"] = {row["stage"]: row["mean_s"] for row in METRICS.snapshot()}
+        info["corpus"] = f"{corpus.kind}-{corpus.size_name}"
+        info["bytes"] = corpus.bytes
+        if benchmark.stats is not None:
+            info["mb_per_s"] = round(corpus.bytes / 2 ** 20 / benchmark.stats.stats.mean, 3)
+        if not request.config.getoption("--skip-rss"):
+            memory = rss.measure(workload, corpus.kind, corpus.size_name, option, model)
+            if "error" in memory:
+                info["rss_error"] = memory["error"]
+            else:
+                info["peak_rss_mb"] = round(memory["peak"] / 2 ** 20, 1)
+                info["workload_rss_mb"] = round((memory["peak"] - memory["baseline"]) / 2 ** 20, 1)
+        return result
+
+    return run
@@ -0,0 +1,81 @@
+"""Reproducible benchmark corpora from 1 KB to 10 MB.
+
+``synthetic`` text is generated from a fixed seed: sentences of Zipf
+distributed words with a sprinkling of capitalized names, split into
+paragraphs, so every run sees exactly the same input. ``fixture`` text
+repeats the news articles in ``fixtures/articles.txt`` up to the requested
+size. Both are cut at a whitespace so no word is split.
+"""
+import itertools
+import os
+import random
+
+
+SIZES = {
+    "1KB": 1_000,
+    "100KB": 100_000,
+    "1MB": 1_000_000,
+    "10MB": 10_000_000,
+}
+KINDS = ("synthetic", "fixture")
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "articles.txt")
+
+_SYLLABLES = ["ka", "lo", "mi", "ren", "tor", "sa", "vel", "din", "op", "ar", "ith", "un", "be", "cos", "na"]
+_NAMES = ["Alice Moreno", "Harbor Electronics", "Riverside", "Paris", "the United Nations",
+          "Dr. Amara Nwosu", "Monday", "Northwind Logistics", "Spain", "$2.3 billion"]
+_FUNCTION_WORDS = ["the", "of", "and", "to", "in", "a", "is", "that", "for", "it", "was", "with"]
+
+
+def _vocabulary(rng, size=20_000):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(1, 4))))
+    return sorted(words)
+
+
+def synthetic_text(size, seed=0):
+    rng = random.Random(seed)
+    vocabulary = _vocabulary(rng)
+    # Zipf-Mandelbrot weights: a long tail of rare words under a flattened
+    # head, since the words that top real frequency lists are the function
+    # words added separately (and dropped as stop words by the summarizers)
+    cum_weights = list(itertools.accumulate(1.0 / (rank + 100) for rank in range(1, len(vocabulary) + 1)))
+    paragraphs = []
+    length = 0
+    while length < size:
+        sentences = []
+        for _ in range(rng.randint(3, 8)):
+            words = rng.choices(vocabulary, cum_weights=cum_weights, k=rng.randint(6, 24))
+            for _ in range(rng.randint(0, 4)):
+                words.insert(rng.randrange(len(words)), rng.choice(_FUNCTION_WORDS))
+            if rng.random() < 0.5:
+                words.insert(rng.randrange(len(words)), rng.choice(_NAMES))
+            sentence = " ".join(words)
+            sentences.append(sentence[0].upper() + sentence[1:] + rng.choice(".....!?"))
+        paragraph = " ".join(sentences)
+        paragraphs.append(paragraph)
+        length += len(paragraph) + 2
+    return _truncate("\n\n".join(paragraphs), size)
+
+
+def fixture_text(size):
+    with open(FIXTURE, encoding="utf-8") as f:
+        articles = f.read().strip()
+    repeats = size // len(articles) + 1
+    return _truncate("\n\n".join([articles] * repeats), size)
+
+
+def _truncate(text, size):
+    if len(text) <= size:
+        return text
+    cut = text.rfind(" ", 0, size)
+    return text[:cut if cut > 0 else size]
+
+
+def load(kind, size_name):
+    size = SIZES[size_name]
+    if kind == "synthetic":
+        return synthetic_text(size)
+    if kind == "fixture":
+        return fixture_text(size)
+    raise ValueError(f"unknown corpus {kind!r}")
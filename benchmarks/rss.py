@@ -0,0 +1,60 @@
+"""Peak resident memory of a workload, measured in a fresh process.
+
+A process's peak RSS only ever grows, so each measurement spawns a new
+interpreter, prepares the input (corpus, parsed sentences, loaded model),
+resets the peak where the kernel allows it and then runs the workload once.
+"""
+import multiprocessing
+import queue as queue_module
+
+from omnitext.metrics import current_rss, peak_rss
+
+
+def _reset_peak():
+    # Linux resets VmHWM when 5 is written to clear_refs; elsewhere the
+    # peak still includes the setup
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _read_peak():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return peak_rss()
+
+
+def _worker(args, queue):
+    import workloads
+
+    try:
+        workload = workloads.run(*args)
+        baseline = current_rss()
+        reset = _reset_peak()
+        workload()
+        queue.put({"baseline": baseline, "peak": _read_peak(), "peak_reset": reset})
+    except Exception as e:
+        queue.put({"error": repr(e)})
+
+
+def measure(workload, kind, size_name, option, model, timeout=3600):
+    """``{"baseline", "peak", ...}`` in bytes for one run of the workload."""
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_worker, args=((workload, kind, size_name, option, model), queue))
+    process.start()
+    try:
+        result = queue.get(timeout=timeout)
+    except queue_module.Empty:
+        process.kill()
+        result = {"error": f"no result after {timeout} seconds"}
+    process.join()
+    return result
@@ -0,0 +1,58 @@
+"""The work each benchmark measures.
+
+Kept in its own module so the peak-memory worker process can import and
+run exactly the same code the timed benchmark runs.
+"""
+import corpora
+from omnitext.analysis import AnalyzedText, summarize_sentences, top_items
+from omnitext.pipelines import get_pipeline, profile_for
+from omnitext.render import bar_chart, word_cloud
+
+
+SUMMARIZERS = ("LSA", "LexRank", "Luhn", "TextRank")
+ANALYSES = ("entities", "summary", "words", "wordcloud", "sentiment", "all")
+ENTITY_TYPES = ["PERSON", "ORG", "GPE", "DATE"]
+SUMMARY_SENTENCES = 5
+
+
+def pipeline_for(analysis, model):
+    entities = analysis in ("entities", "all")
+    sentences = analysis in ("summary", "all")
+    return get_pipeline(profile_for(entities, sentences), model)
+
+
+def parse_sentences(text):
+    """Sentences as the summarizers get them, from the rule-based pipeline."""
+    return AnalyzedText(get_pipeline("sentences"), text, find_entities=False).sentences
+
+
+def summarize(sentences, summarizer):
+    return summarize_sentences(sentences, summarizer, SUMMARY_SENTENCES)
+
+
+def analyze(text, analysis, nlp):
+    """One analysis type from a fresh parse, as the app runs it without a result cache."""
+    entities = analysis in ("entities", "all")
+    sentences = analysis in ("summary", "all")
+    analyzed = AnalyzedText(nlp, text, keep_sentences=sentences, find_entities=entities)
+    if entities:
+        bar_chart(top_items(analyzed.entity_counts(ENTITY_TYPES)), "Top Entity Frequency")
+    if sentences:
+        analyzed.summarize("LSA", SUMMARY_SENTENCES)
+    if analysis in ("words", "all"):
+        bar_chart(top_items(analyzed.word_counts()), "Top Words (excluding stop words)")
+    if analysis in ("wordcloud", "all"):
+        word_cloud(analyzed.word_counts())
+    if analysis in ("sentiment", "all"):
+        analyzed.sentiment
+    return analyzed
+
+
+def run(workload, kind, size_name, option, model):
+    """Run one workload from scratch; used by the peak-memory worker."""
+    text = corpora.load(kind, size_name)
+    if workload == "summarizer":
+        sentences = parse_sentences(text)
+        return lambda: summarize(sentences, option)
+    nlp = pipeline_for(option, model)
+    return lambda: analyze(text, option, nlp)
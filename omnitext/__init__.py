@@ -0,0 +1,26 @@
+"""OmniText: named entity recognition, summarization and sentiment analysis.
+
+The functions below import spaCy, sumy and TextBlob lazily, so importing
+the package is cheap and each analysis only loads what it needs.
+"""
+from .analysis import (
+    AnalyzedText,
+    Sentiment,
+    extract_entities,
+    sentiment,
+    summarize,
+    word_frequencies,
+)
+from .pipelines import ModelNotInstalled, download_model, get_pipeline
+
+__all__ = [
+    "AnalyzedText",
+    "Sentiment",
+    "ModelNotInstalled",
+    "download_model",
+    "extract_entities",
+    "get_pipeline",
+    "sentiment",
+    "summarize",
+    "word_frequencies",
+]
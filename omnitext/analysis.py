@@ -0,0 +1,401 @@
+"""Text analysis shared by the Streamlit app, the CLI and batch mode.
+
+spaCy, sumy and TextBlob are only imported by the functions that need them,
+so importing this module (or running just one kind of analysis) stays cheap.
+"""
+import importlib
+import re
+import threading
+from collections import Counter, namedtuple
+
+from .metrics import stage
+from .pipelines import get_pipeline, select_pipes
+from .stages import Cancelled
+
+
+Sentiment = namedtuple("Sentiment", ["polarity", "subjectivity"])
+
+SUMMARIZERS = {
+    "LSA": ("sumy.summarizers.lsa", "LsaSummarizer"),
+    "LexRank": ("sumy.summarizers.lex_rank", "LexRankSummarizer"),
+    "Luhn": ("sumy.summarizers.luhn", "LuhnSummarizer"),
+    "TextRank": ("sumy.summarizers.text_rank", "TextRankSummarizer"),
+}
+
+# Same word filter sumy's own Tokenizer applies (drops punctuation and numbers)
+_WORD_PATTERN = re.compile(r"^[^\W\d_](?:[^\W\d_]|['-])*$", re.UNICODE)
+
+# Texts longer than this are parsed in chunks (spaCy's own limit is 1,000,000)
+CHUNK_CHARS = 100_000
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_WHITESPACE = re.compile(r"\s+")
+
+# NLTK, which sumy and TextBlob both import, can fail with a circular
+# import error when two threads import it for the first time at once
+_NLTK_IMPORT_LOCK = threading.Lock()
+
+
+def _import_nltk():
+    with _NLTK_IMPORT_LOCK:
+        import nltk  # noqa: F401
+
+
+class _SpacyWords:
+    """Word tokenizer for sumy that returns the words spaCy already found."""
+
+    def __init__(self, sentences, language="english"):
+        self.language = language
+        self._words = dict(sentences)
+
+    def to_words(self, sentence):
+        return self._words[sentence]
+
+
+def iter_chunks(text, max_chars=CHUNK_CHARS):
+    """Split ``text`` into pieces of at most ``max_chars`` characters.
+
+    Cuts fall on the last paragraph break in each window, else the last
+    sentence end, else the last whitespace, so spaCy rarely sees a sentence
+    split in two.
+    """
+    start = 0
+    while len(text) - start > max_chars:
+        window = text[start:start + max_chars]
+        cut = 0
+        for pattern in (_PARAGRAPH_BREAK, _SENTENCE_END, _WHITESPACE):
+            for match in pattern.finditer(window):
+                cut = match.end()
+            if cut:
+                break
+        cut = cut or max_chars
+        yield window[:cut]
+        start += cut
+    if start < len(text):
+        yield text[start:]
+
+
+def sentence_words(doc, vocab=None):
+    """Plain ``(text, words)`` pairs for each sentence of a parsed ``Doc``.
+
+    Unlike the ``Doc`` itself these can be pickled and sent to worker
+    processes. Passing the same ``vocab`` dict across calls makes repeated
+    words share one string object, which keeps long documents small.
+    """
+    sentences = []
+    for sent in doc.sents:
+        text = sent.text.strip()
+        if text:
+            words = tuple(token.text for token in sent if _WORD_PATTERN.match(token.text))
+            if vocab is not None:
+                words = tuple(vocab.setdefault(word, word) for word in words)
+            sentences.append((text, words))
+    return sentences
+
+
+def sentiment_tokens(text):
+    """Lowercased words of ``text``, split the way ``TextBlob(text).sentiment`` splits them.
+
+    TextBlob's negation and intensifier rules depend on its own tokens
+    ("was n ' t bad"), so scoring spaCy's tokens would give different scores.
+    """
+    _import_nltk()
+    from textblob.en import sentiment as pattern_sentiment
+
+    return [word.lower() for word in " ".join(pattern_sentiment.tokenizer(text)).split()]
+
+
+def build_document(sentences):
+    from sumy.models.dom import ObjectDocumentModel, Paragraph, Sentence
+
+    # Build sumy's document model straight from spaCy's sentences
+    tokenizer = _SpacyWords(sentences)
+    return ObjectDocumentModel(
+        [Paragraph([Sentence(text, tokenizer) for text, _ in sentences])]
+    )
+
+
+def summarize_document(document, summarizer_type, sentences_count):
+    from sumy.nlp.stemmers import Stemmer
+    from sumy.utils import get_stop_words
+
+    module, name = SUMMARIZERS[summarizer_type]
+    summarizer_class = getattr(importlib.import_module(module), name)
+    summarizer = summarizer_class(Stemmer("english"))
+    summarizer.stop_words = get_stop_words("english")
+    summary_sentences = summarizer(document, sentences_count)
+    return " ".join(str(sentence) for sentence in summary_sentences)
+
+
+def summarize_sentences(sentences, summarizer_type, sentences_count, engine="auto"):
+    """Summarize ``(text, words)`` sentence pairs.
+
+    LexRank, TextRank and LSA use the vectorized engine in
+    ``omnitext.summarizers`` when NumPy and SciPy are installed; it picks the
+    same sentences as sumy, much faster. ``engine="sumy"`` forces sumy, which
+    is always used for Luhn.
+    """
+    if not sentences:
+        return ""
+    _import_nltk()
+    if engine != "sumy":
+        try:
+            from . import summarizers
+        except ImportError:
+            if engine == "builtin":
+                raise
+            summarizers = None
+        if summarizers is not None and summarizer_type in summarizers.SUMMARIZERS:
+            with stage("summarize", summarizer=summarizer_type, engine="builtin"):
+                return summarizers.summarize(sentences, summarizer_type, sentences_count)
+    with stage("summarize", summarizer=summarizer_type, engine="sumy"):
+        return summarize_document(build_document(sentences), summarizer_type, sentences_count)
+
+
+def sentiment_of(tokens):
+    # Same lexicon TextBlob(text).sentiment uses; accepts a string or a token list
+    _import_nltk()
+    from textblob.en import sentiment as pattern_sentiment
+
+    return Sentiment(*pattern_sentiment(tokens))
+
+
+def sentiment_totals(tokens):
+    """Summed polarity, summed subjectivity and number of assessed words.
+
+    TextBlob's scores are plain averages over these assessments, so totals
+    from separate chunks can be added up and divided at the end.
+    """
+    _import_nltk()
+    from textblob.en import sentiment as pattern_sentiment
+
+    assessments = pattern_sentiment.assessments((token, None) for token in tokens)
+    return (
+        sum(a[1] for a in assessments),
+        sum(a[2] for a in assessments),
+        len(assessments),
+    )
+
+
+def count_entities(doc):
+    return Counter((ent.text, ent.label_) for ent in doc.ents)
+
+
+def count_words(doc):
+    return Counter(token.text for token in doc if not token.is_stop and token.is_alpha)
+
+
+def top_items(counter, n=10):
+    return dict(sorted(counter.items(), key=lambda x: x[1], reverse=True)[:n])
+
+
+def _parse_chunks(text, nlp, entities=False, sentences=False, batch_size=4):
+    with select_pipes(nlp, entities, sentences), stage("parse", pipes=",".join(nlp.pipe_names)):
+        yield from nlp.pipe(iter_chunks(text), batch_size=batch_size)
+
+
+def summarize(text, summarizer_type="LSA", sentences_count=5, nlp=None):
+    """Summarize ``text`` into ``sentences_count`` sentences.
+
+    Without ``nlp`` the sentences come from the rule-based ``"sentences"``
+    pipeline, so no model is loaded.
+    """
+    vocab = {}
+    sentences = []
+    for doc in _parse_chunks(text, nlp or get_pipeline("sentences"), sentences=True):
+        sentences.extend(sentence_words(doc, vocab))
+    return summarize_sentences(sentences, summarizer_type, sentences_count)
+
+
+def extract_entities(text, entity_types=None, nlp=None):
+    """Return ``(text, label)`` pairs for the named entities in ``text``."""
+    return [
+        (ent.text, ent.label_)
+        for doc in _parse_chunks(text, nlp or get_pipeline("ner"), entities=True)
+        for ent in doc.ents
+        if not entity_types or ent.label_ in entity_types
+    ]
+
+
+def sentiment(text):
+    """Polarity and subjectivity of ``text``, as ``TextBlob(text).sentiment`` gives."""
+    return sentiment_of(text)
+
+
+def word_frequencies(text, top_n=10, nlp=None):
+    """Most frequent non-stop-words in ``text``, most common first."""
+    counts = Counter()
+    for doc in _parse_chunks(text, nlp or get_pipeline("tokens")):
+        counts.update(count_words(doc))
+    return top_items(counts, top_n)
+
+
+class _Aggregate:
+    """Everything the stages need from a parse, without the ``Doc`` objects."""
+
+    def __init__(self):
+        self.entity_counts = Counter()
+        self.entity_spans = []
+        self.word_counts = Counter()
+        self.sentences = []
+        self.chunks = 0
+
+
+class AnalyzedText:
+    """Runs the spaCy pipeline once over a text and shares the result.
+
+    Entities, word frequencies and sumy summaries are all derived from the
+    same parse so the text is only tokenized by spaCy a single time (sentiment
+    goes by TextBlob's own tokens and is scored separately). Texts
+    longer than ``chunk_chars`` are streamed through ``nlp.pipe`` in chunks
+    and only running counts are kept, so memory doesn't grow with a giant
+    ``Doc``. When a ``ResultCache`` is given each stage is looked up there
+    first, and the text is only parsed if some stage actually has to be
+    computed.
+
+    The stages can be read from several threads at once; the text is still
+    parsed only once. Call ``load()`` first and read the stages after it
+    finishes, so other threads aren't left waiting on the parse. Setting the
+    ``cancel`` event stops a parse in progress at the next chunk with
+    ``Cancelled``.
+    """
+
+    def __init__(self, nlp, text, cache=None, chunk_chars=CHUNK_CHARS,
+                 keep_sentences=True, find_entities=True, cancel=None):
+        self.nlp = nlp
+        self.text = text
+        self.cache = cache
+        self.chunk_chars = chunk_chars
+        # Sentences are only needed for summaries; skip them to save memory
+        self.keep_sentences = keep_sentences
+        self.find_entities = find_entities
+        self.cancel = cancel
+        self._parse_lock = threading.Lock()
+        self._parsed = None
+        # Stage results, each computed under its own lock on this instance
+        # (functools.cached_property locks across all instances before 3.12)
+        self._results = {}
+        self._result_locks = {}
+        self._locks_lock = threading.Lock()
+
+    @property
+    def is_chunked(self):
+        return len(self.text) > self.chunk_chars
+
+    @property
+    def _aggregate(self):
+        with self._parse_lock:
+            if self._parsed is None:
+                self._parsed = self._parse()
+            return self._parsed
+
+    def _parse(self):
+        aggregate = _Aggregate()
+        vocab = {}
+        offset = 0
+        chunks = iter_chunks(self.text, self.chunk_chars)
+        # Only run the components this analysis needs, whatever nlp was given
+        with select_pipes(self.nlp, self.find_entities, self.keep_sentences), \
+                stage("parse", pipes=",".join(self.nlp.pipe_names)):
+            for doc in self.nlp.pipe(chunks, batch_size=2):
+                if self.cancel is not None and self.cancel.is_set():
+                    raise Cancelled()
+                aggregate.chunks += 1
+                aggregate.entity_counts.update(count_entities(doc))
+                aggregate.entity_spans.extend(
+                    (offset + ent.start_char, offset + ent.end_char, ent.label_) for ent in doc.ents
+                )
+                offset += len(doc.text)
+                aggregate.word_counts.update(count_words(doc))
+                if self.keep_sentences:
+                    aggregate.sentences.extend(sentence_words(doc, vocab))
+        return aggregate
+
+    def cached(self, stage, compute, **settings):
+        if self.cache is None:
+            return compute()
+        return self.cache.get_or_compute(stage, self.text, compute, **settings)
+
+    def _memoized(self, stage, compute):
+        with self._locks_lock:
+            lock = self._result_locks.setdefault(stage, threading.Lock())
+        with lock:
+            if stage not in self._results:
+                self._results[stage] = self.cached(stage, compute)
+            return self._results[stage]
+
+    def load(self):
+        """Read every stage of the parse from the cache, parsing the text if any is missing."""
+        if self.find_entities:
+            self.entities
+            self.entity_spans
+        self.words
+        return self
+
+    @property
+    def entities(self):
+        """``Counter`` of ``(text, label)`` pairs."""
+        if not self.find_entities:
+            raise ValueError("AnalyzedText was created with find_entities=False")
+        return self._memoized("entity_counts", lambda: self._aggregate.entity_counts)
+
+    @property
+    def entity_spans(self):
+        """Sorted ``(start, end, label)`` character offsets of every entity in the text."""
+        if not self.find_entities:
+            raise ValueError("AnalyzedText was created with find_entities=False")
+        return self._memoized("entity_spans", lambda: self._aggregate.entity_spans)
+
+    @property
+    def words(self):
+        """``Counter`` of words, excluding stop words and non-alphabetic tokens."""
+        return self._memoized("word_counts", lambda: self._aggregate.word_counts)
+
+    @property
+    def sentences(self):
+        """``(text, words)`` pairs for every sentence, as used for summaries.
+
+        Cached like the other stages, so a new summarizer or summary length
+        doesn't parse the text again.
+        """
+        if not self.keep_sentences:
+            raise ValueError("AnalyzedText was created with keep_sentences=False")
+        return self._memoized("sentences", lambda: self._aggregate.sentences)
+
+    @property
+    def sentiment(self):
+        """Polarity and subjectivity, as ``TextBlob(text).sentiment`` gives.
+
+        Scored straight from the text, chunk by chunk, so it doesn't wait for
+        the parse and can run alongside the other stages.
+        """
+        def compute():
+            totals = [0.0, 0.0, 0]
+            with stage("sentiment"):
+                for chunk in iter_chunks(self.text, self.chunk_chars):
+                    if self.cancel is not None and self.cancel.is_set():
+                        raise Cancelled()
+                    for i, total in enumerate(sentiment_totals(sentiment_tokens(chunk))):
+                        totals[i] += total
+            polarity, subjectivity, n = totals
+            return Sentiment(polarity / (n or 1), subjectivity / (n or 1))
+
+        return self._memoized("sentiment", compute)
+
+    def entity_counts(self, entity_types):
+        counts = Counter()
+        for (text, label), count in self.entities.items():
+            if label in entity_types:
+                counts[text] += count
+        return counts
+
+    def word_counts(self):
+        return self.words
+
+    def summarize(self, summarizer_type, sentences_count):
+        return self.cached(
+            "summary",
+            lambda: summarize_sentences(self.sentences, summarizer_type, sentences_count),
+            summarizer=summarizer_type,
+            sentences=sentences_count,
+        )
@@ -0,0 +1,250 @@
+"""Batch corpus mode: analyze many documents with nlp.pipe and a process pool.
+
+Documents are streamed from CSV, JSONL, ZIP archives or directories of text
+files, parsed with ``nlp.pipe`` and summarized/scored in worker processes.
+Results are written incrementally, so memory use stays bounded by the
+number of documents in flight rather than by the size of the corpus.
+"""
+import codecs
+import csv
+import json
+import os
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .analysis import (
+    count_entities,
+    count_words,
+    sentence_words,
+    sentiment_of,
+    sentiment_tokens,
+    summarize_sentences,
+    top_items,
+)
+
+
+TEXT_EXTENSIONS = (".txt", ".md", ".text")
+TABLE_EXTENSIONS = (".csv", ".jsonl", ".ndjson")
+SUPPORTED_EXTENSIONS = TEXT_EXTENSIONS + TABLE_EXTENSIONS
+
+# Allow whole articles in a single CSV field
+csv.field_size_limit(2**31 - 1)
+
+
+def _lines(stream):
+    # Decode line by line rather than with io.TextIOWrapper, which closes the
+    # stream it wraps when it is garbage collected; uploads are read twice.
+    # utf-8-sig drops the byte order mark Excel puts in "CSV UTF-8" exports
+    return codecs.iterdecode(stream, "utf-8-sig", errors="replace")
+
+
+def _iter_csv(stream, name, text_field, id_field):
+    reader = csv.DictReader(_lines(stream))
+    if reader.fieldnames is not None and text_field not in reader.fieldnames:
+        # One error for the file rather than an empty document per row
+        yield name, "", f"no {text_field!r} column (columns: {', '.join(reader.fieldnames)})"
+        return
+    for i, row in enumerate(reader):
+        yield row.get(id_field) or f"{name}:{i}", row.get(text_field) or "", None
+
+
+def _iter_jsonl(stream, name, text_field, id_field):
+    for i, line in enumerate(_lines(stream)):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield f"{name}:{i}", "", f"invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield f"{name}:{i}", "", "expected a JSON object"
+            continue
+        doc_id = str(record.get(id_field) or f"{name}:{i}")
+        text = record.get(text_field) or ""
+        if isinstance(text, str):
+            yield doc_id, text, None
+        else:
+            yield doc_id, "", f"{text_field!r} is not a string"
+
+
+def _iter_stream(stream, name, text_field, id_field):
+    lower = name.lower()
+    if lower.endswith(".csv"):
+        yield from _iter_csv(stream, name, text_field, id_field)
+    elif lower.endswith((".jsonl", ".ndjson")):
+        yield from _iter_jsonl(stream, name, text_field, id_field)
+    elif lower.endswith(".zip"):
+        with zipfile.ZipFile(stream) as archive:
+            for member in archive.infolist():
+                if member.is_dir() or not member.filename.lower().endswith(SUPPORTED_EXTENSIONS):
+                    continue
+                with archive.open(member) as inner:
+                    yield from _iter_stream(inner, member.filename, text_field, id_field)
+    elif lower.endswith(TEXT_EXTENSIONS):
+        yield name, stream.read().decode("utf-8", errors="replace"), None
+
+
+def iter_documents(source, name=None, text_field="text", id_field="id"):
+    """Yield ``(doc_id, text, error)`` for each document in a file, directory or binary file object.
+
+    CSV and JSONL rows use ``text_field`` and ``id_field``; plain text files
+    become one document each, named after the file. ``error`` is None unless
+    the document couldn't be read, e.g. a malformed JSONL line.
+    """
+    if hasattr(source, "read"):
+        yield from _iter_stream(source, name or getattr(source, "name", "upload"), text_field, id_field)
+    elif os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for filename in sorted(files):
+                path = os.path.join(root, filename)
+                with open(path, "rb") as stream:
+                    yield from _iter_stream(stream, os.path.relpath(path, source), text_field, id_field)
+    else:
+        with open(source, "rb") as stream:
+            yield from _iter_stream(stream, os.path.basename(source), text_field, id_field)
+
+
+def _summarize_and_score(sentences, tokens, summarizer_type, sentences_count):
+    # Runs in a worker process, on the plain data extracted from the parse
+    summary = summarize_sentences(sentences, summarizer_type, sentences_count) if summarizer_type else None
+    sentiment = sentiment_of(tokens)
+    return summary, sentiment.polarity, sentiment.subjectivity
+
+
+def _record(doc_id, doc, entity_types, top_n):
+    entities = count_entities(doc)
+    words = count_words(doc)
+    return {
+        "id": doc_id,
+        "entities": [
+            {"text": text, "label": label, "count": count}
+            for (text, label), count in entities.most_common()
+            if not entity_types or label in entity_types
+        ],
+        "top_words": [
+            {"word": word, "count": count} for word, count in top_items(words, top_n).items()
+        ],
+    }
+
+
+class JsonlWriter:
+    def __init__(self, path):
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetWriter:
+    """Buffers records into row groups; needs the optional ``pyarrow`` package."""
+
+    def __init__(self, path, row_group_size=1000):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet output needs pyarrow: pip install pyarrow")
+        self._pa = pa
+        self._schema = pa.schema([
+            ("id", pa.string()),
+            ("entities", pa.list_(pa.struct([("text", pa.string()), ("label", pa.string()), ("count", pa.int64())]))),
+            ("top_words", pa.list_(pa.struct([("word", pa.string()), ("count", pa.int64())]))),
+            ("summary", pa.string()),
+            ("polarity", pa.float64()),
+            ("subjectivity", pa.float64()),
+            ("error", pa.string()),
+        ])
+        self._writer = pq.ParquetWriter(path, self._schema)
+        self._rows = []
+        self.row_group_size = row_group_size
+
+    def write(self, record):
+        self._rows.append(record)
+        if len(self._rows) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if self._rows:
+            self._writer.write_table(self._pa.Table.from_pylist(self._rows, schema=self._schema))
+            self._rows = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+def open_writer(path, output_format=None):
+    output_format = output_format or ("parquet" if path.endswith(".parquet") else "jsonl")
+    if output_format == "parquet":
+        return ParquetWriter(path)
+    return JsonlWriter(path)
+
+
+def run_batch(
+    documents,
+    nlp,
+    writer,
+    summarizer_type="LSA",
+    sentences_count=5,
+    entity_types=None,
+    top_n=10,
+    batch_size=64,
+    n_process=1,
+    workers=None,
+    max_pending=None,
+    progress=None,
+):
+    """Analyze ``(doc_id, text, error)`` documents and write one record per document.
+
+    spaCy parses in batches of ``batch_size`` across ``n_process`` processes;
+    summarization and sentiment run in a pool of ``workers`` processes. At most
+    ``max_pending`` documents wait on the pool at a time, and records are
+    written in input order. ``summarizer_type=None`` skips summaries.
+
+    A document that can't be read or analyzed gets an ``"error"`` field in
+    its record and the run carries on with the next one. ``progress`` is
+    called with the number of documents written so far. Returns that number.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or workers * 4
+    pending = deque()
+    done = 0
+
+    def write_next():
+        nonlocal done
+        record, future = pending.popleft()
+        if future is not None:
+            try:
+                record["summary"], record["polarity"], record["subjectivity"] = future.result()
+            except Exception as e:
+                record["error"] = f"{type(e).__name__}: {e}"
+        writer.write(record)
+        done += 1
+        if progress is not None:
+            progress(done)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Unreadable documents pass through the pipe as empty texts to keep their place
+        texts = (("" if error else text, (doc_id, error)) for doc_id, text, error in documents)
+        for doc, (doc_id, error) in nlp.pipe(texts, as_tuples=True, batch_size=batch_size, n_process=n_process):
+            if error:
+                pending.append(({"id": doc_id, "error": error}, None))
+            else:
+                record = _record(doc_id, doc, entity_types, top_n)
+                future = pool.submit(
+                    _summarize_and_score, sentence_words(doc) if summarizer_type else [],
+                    sentiment_tokens(doc.text), summarizer_type, sentences_count,
+                )
+                pending.append((record, future))
+            while len(pending) >= max_pending:
+                write_next()
+        while pending:
+            write_next()
+    return done
+
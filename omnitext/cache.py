@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def make_key(stage, text, **settings):
+    """Content-addressed key: the stage name, a hash of the text and its settings."""
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    params = json.dumps(settings, sort_keys=True, default=list)
+    return f"{stage}:{digest}:{params}"
+
+
+class MemoryBackend:
+    """Size-bounded LRU dict of (stored_at, value) entries, local to one process."""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, ttl):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if ttl is not None and time.time() - entry[0] > ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, value, stored_at=None):
+        with self._lock:
+            self._entries[key] = (stored_at or time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DiskBackend:
+    """SQLite-backed LRU store that several worker processes can share."""
+
+    def __init__(self, directory, maxsize=4096):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, "results.sqlite3")
+        self.maxsize = maxsize
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value BLOB, stored_at REAL, accessed_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_lru ON results (accessed_at)")
+
+    def _connect(self):
+        # sqlite connections can't be shared between threads, so keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key, ttl):
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT value, stored_at FROM results WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, stored_at = row
+        now = time.time()
+        with conn:
+            if ttl is not None and now - stored_at > ttl:
+                conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+        return stored_at, pickle.loads(value)
+
+    def set(self, key, value, stored_at=None):
+        now = time.time()
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), stored_at or now, now),
+            )
+            # Evict the least recently used rows beyond maxsize
+            conn.execute(
+                "DELETE FROM results WHERE key IN ("
+                "SELECT key FROM results ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.maxsize,),
+            )
+
+    def clear(self):
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM results")
+
+
+class ResultCache:
+    """Per-stage cache of analysis results, keyed by text content and settings.
+
+    Results are kept in an in-process LRU and, when ``directory`` is given,
+    also in a shared on-disk store. Entries older than ``ttl`` seconds are
+    recomputed.
+    """
+
+    def __init__(self, maxsize=256, ttl=24 * 60 * 60, directory=None, disk_maxsize=4096):
+        self.ttl = ttl
+        self.memory = MemoryBackend(maxsize)
+        self.disk = DiskBackend(directory, disk_maxsize) if directory else None
+
+    def get(self, key):
+        entry = self.memory.get(key, self.ttl)
+        if entry is None and self.disk is not None:
+            entry = self.disk.get(key, self.ttl)
+            if entry is not None:
+                self.memory.set(key, entry[1], stored_at=entry[0])
+        return entry
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+        if self.disk is not None:
+            self.disk.set(key, value)
+
+    def get_or_compute(self, stage, text, compute, **settings):
+        """Return the cached result for this stage, or run ``compute()`` and store it."""
+        key = make_key(stage, text, **settings)
+        entry = self.get(key)
+        if entry is not None:
+            return entry[1]
+        value = compute()
+        self.set(key, value)
+        return value
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
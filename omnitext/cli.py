@@ -0,0 +1,175 @@
+"""``omnitext`` command line interface.
+
+Reads text from files, URLs or stdin and prints one JSON object per input. Each
+command only imports what its analysis needs: ``sentiment`` never touches
+spaCy, and ``summarize``/``words`` use a blank spaCy pipeline instead of
+loading a model. ``omnitext setup`` downloads the model ahead of time.
+"""
+import argparse
+import json
+import os
+import sys
+
+from . import analysis
+from .metrics import METRICS, configure_from_env
+from .pipelines import DEFAULT_MODEL, ModelNotInstalled, download_model, get_pipeline
+
+
+SUMMARIZER_CHOICES = list(analysis.SUMMARIZERS)
+
+
+def _read_inputs(paths):
+    """Yield ``(source, text, error)`` for each file, URL or ``-`` (stdin)."""
+    paths = paths or ["-"]
+    urls = [path for path in paths if path.startswith(("http://", "https://"))]
+    fetched = {}
+    if urls:
+        from .fetch import Fetcher
+
+        # Download every URL concurrently up front
+        fetcher = Fetcher(cache_dir=os.environ.get("OMNITEXT_HTTP_CACHE_DIR"))
+        fetched = {url: (text, error) for url, text, error in fetcher.fetch_many(urls)}
+        fetcher.close()
+    for path in paths:
+        if path in fetched:
+            yield (path,) + fetched[path]
+        elif path == "-":
+            yield "<stdin>", sys.stdin.read(), None
+        else:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    text = f.read()
+            except (OSError, UnicodeDecodeError) as e:
+                yield path, None, e
+            else:
+                yield path, text, None
+
+
+def _summarize(text, args):
+    return {"summary": analysis.summarize(text, args.summarizer, args.sentences)}
+
+
+def _entities(text, args):
+    entities = analysis.extract_entities(text, args.types, nlp=get_pipeline("ner", args.model))
+    return {"entities": [{"text": t, "label": label} for t, label in entities]}
+
+
+def _sentiment(text, args):
+    result = analysis.sentiment(text)
+    return {"polarity": result.polarity, "subjectivity": result.subjectivity}
+
+
+def _words(text, args):
+    return {"top_words": analysis.word_frequencies(text, args.top)}
+
+
+def _analyze(text, args):
+    analyzed = analysis.AnalyzedText(get_pipeline("ner", args.model), text)
+    return {
+        "entities": [
+            {"text": t, "label": label, "count": count}
+            for (t, label), count in analyzed.entities.most_common()
+            if not args.types or label in args.types
+        ],
+        "summary": analyzed.summarize(args.summarizer, args.sentences),
+        "top_words": analysis.top_items(analyzed.word_counts(), args.top),
+        "polarity": analyzed.sentiment.polarity,
+        "subjectivity": analyzed.sentiment.subjectivity,
+    }
+
+
+def _setup(args):
+    download_model(args.model)
+    print(f"spaCy model {args.model} is installed", file=sys.stderr)
+
+
+def _batch(args):
+    from .batch import iter_documents, open_writer, run_batch
+
+    documents = iter_documents(args.source, text_field=args.text_field, id_field=args.id_field)
+    writer = open_writer(args.output)
+    try:
+        count = run_batch(
+            documents, get_pipeline("ner", args.model), writer,
+            summarizer_type=None if args.no_summary else args.summarizer,
+            sentences_count=args.sentences,
+            entity_types=args.types,
+            top_n=args.top,
+            batch_size=args.batch_size,
+            n_process=args.n_process,
+            workers=args.workers,
+            progress=lambda n: print(f"\r{n} documents", end="", file=sys.stderr),
+        )
+    finally:
+        writer.close()
+    print(f"\nWrote {count} documents to {args.output}", file=sys.stderr)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="omnitext", description="NER, summarization and sentiment for text.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def command(name, handler, help, files=True):
+        sub = commands.add_parser(name, help=help)
+        if files:
+            sub.add_argument("files", nargs="*", help="input files or URLs (default: stdin)")
+        sub.set_defaults(handler=handler)
+        return sub
+
+    def summary_options(sub):
+        sub.add_argument("--summarizer", default="LSA", choices=SUMMARIZER_CHOICES)
+        sub.add_argument("--sentences", type=int, default=5, help="summary length in sentences")
+
+    def model_options(sub):
+        sub.add_argument("--model", default=DEFAULT_MODEL, help="spaCy model to load")
+        sub.add_argument("--types", nargs="*", default=None, help="entity types to keep (default: all)")
+
+    summary_options(command("summarize", _summarize, "summarize text"))
+    model_options(command("entities", _entities, "extract named entities"))
+    command("sentiment", _sentiment, "polarity and subjectivity")
+    command("words", _words, "most frequent words").add_argument("--top", type=int, default=10)
+
+    sub = command("analyze", _analyze, "run every analysis on a single parse")
+    summary_options(sub)
+    model_options(sub)
+    sub.add_argument("--top", type=int, default=10)
+
+    sub = command("batch", _batch, "analyze a corpus (CSV, JSONL, ZIP or directory)", files=False)
+    sub.add_argument("source", help="CSV, JSONL or ZIP file, or a directory of text files")
+    sub.add_argument("output", help="output path (.jsonl or .parquet)")
+    sub.add_argument("--text-field", default="text")
+    sub.add_argument("--id-field", default="id")
+    summary_options(sub)
+    sub.add_argument("--no-summary", action="store_true", help="skip summaries (entities, words and sentiment only)")
+    model_options(sub)
+    sub.add_argument("--top", type=int, default=10)
+    sub.add_argument("--batch-size", type=int, default=64, help="spaCy nlp.pipe batch size")
+    sub.add_argument("--n-process", type=int, default=1, help="spaCy nlp.pipe processes")
+    sub.add_argument("--workers", type=int, default=None, help="summarization/sentiment processes")
+    sub = command("setup", _setup, "download the spaCy model ahead of time", files=False)
+    sub.add_argument("--model", default=DEFAULT_MODEL)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    configure_from_env()
+    try:
+        _run(args)
+    except ModelNotInstalled as e:
+        sys.exit(f"omnitext: {e}")
+    finally:
+        METRICS.write_prometheus()
+
+
+def _run(args):
+    if args.command in ("batch", "setup"):
+        args.handler(args)
+        return
+    for source, text, error in _read_inputs(args.files):
+        result = {"source": source}
+        if error is not None:
+            result["error"] = str(error)
+        else:
+            result.update(args.handler(text, args))
+        print(json.dumps(result, ensure_ascii=False))
@@ -0,0 +1,209 @@
+"""URL ingestion: pooled, size-limited downloads with an on-disk HTTP cache.
+
+A ``Fetcher`` keeps one ``requests.Session`` (and its connection pool) for
+all downloads, streams each response with a byte limit and an overall
+deadline, and extracts the ``<p>`` text with lxml when it is installed.
+With a ``cache_dir`` the extracted text is stored together with the
+response's ETag/Last-Modified, so fetching the same article again only
+costs a conditional request and no re-parsing when the server answers
+304 Not Modified.
+"""
+import codecs
+import hashlib
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+from .metrics import stage
+
+
+class FetchError(Exception):
+    """Raised when a URL can't be downloaded or is too large."""
+
+
+def extract_text(html, encoding=None):
+    """Join the text of every ``<p>`` element, like the app always has.
+
+    ``encoding`` is the charset the server declared for ``html`` bytes;
+    without one the parser goes by the page's ``<meta charset>``.
+    """
+    try:
+        import lxml.html
+    except ImportError:
+        lxml = None
+    if lxml is not None:
+        try:
+            parser = lxml.html.HTMLParser(encoding=encoding) if encoding else None
+            tree = lxml.html.document_fromstring(html, parser=parser)
+        except (ValueError, lxml.etree.ParserError):
+            return ""
+        return " ".join(p.text_content() for p in tree.iter("p"))
+
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    # Only build the tree for <p> tags instead of the whole page
+    soup = BeautifulSoup(html, "html.parser", parse_only=SoupStrainer("p"), from_encoding=encoding)
+    return " ".join(p.get_text() for p in soup.find_all("p"))
+
+
+def _declared_encoding(response):
+    # requests falls back to ISO-8859-1 for any text/* response, so only
+    # trust its encoding when the Content-Type header names a charset
+    if "charset" not in response.headers.get("Content-Type", "").lower():
+        return None
+    try:
+        return codecs.lookup(response.encoding).name
+    except (LookupError, TypeError):
+        return None
+
+
+class _HttpCache:
+    """Extracted text plus validators for each URL, one JSON file per URL."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    # Bumped when extraction changes, so older entries are fetched again
+    # (version 2: the declared charset is honoured)
+    VERSION = 2
+
+    def _path(self, url):
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.v{self.VERSION}.json")
+
+    def get(self, url):
+        try:
+            with open(self._path(url), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def set(self, url, entry):
+        # Write to a temporary file first so concurrent readers never see half an entry
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, self._path(url))
+
+
+class Fetcher:
+    """Downloads pages and extracts their paragraph text.
+
+    ``timeout`` is the (connect, read) timeout passed to requests and
+    ``deadline`` caps the whole request, so a slow site can't hold a worker
+    forever: the body is read as it arrives and no socket read waits past
+    the deadline, however slowly the server trickles data. Responses larger
+    than ``max_bytes`` raise ``FetchError``.
+    """
+
+    def __init__(
+        self,
+        cache_dir=None,
+        timeout=(5, 15),
+        deadline=30,
+        max_bytes=5 * 1024 * 1024,
+        max_workers=8,
+        user_agent="OmniText/0.1 (+https://github.com/Silverfang180/omnitext)",
+    ):
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_bytes = max_bytes
+        self.max_workers = max_workers
+        self.cache = _HttpCache(cache_dir) if cache_dir else None
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = user_agent
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _timeout(self):
+        # Waiting for the response headers counts against the deadline too
+        if isinstance(self.timeout, tuple):
+            connect, read = self.timeout
+        else:
+            connect = read = self.timeout
+        return connect, min(read, self.deadline) if read is not None else self.deadline
+
+    def _download(self, response, stop_at):
+        length = response.headers.get("Content-Length")
+        if length and length.isdigit() and int(length) > self.max_bytes:
+            raise FetchError(f"response is {int(length)} bytes, limit is {self.max_bytes}")
+        read_timeout = self._timeout()[1]
+        # read1 returns whatever one socket read gets instead of waiting for a
+        # full chunk, so a server sending a byte at a time can't run past the
+        # deadline between checks
+        read = getattr(response.raw, "read1", response.raw.read)
+        sock = getattr(getattr(response.raw, "connection", None), "sock", None)
+        body = bytearray()
+        try:
+            while True:
+                remaining = stop_at - time.monotonic()
+                if remaining <= 0:
+                    raise FetchError(f"download took longer than {self.deadline} seconds")
+                if sock is not None:
+                    sock.settimeout(min(read_timeout, remaining))
+                try:
+                    chunk = read(64 * 1024, decode_content=True)
+                except urllib3.exceptions.HTTPError as e:
+                    if time.monotonic() >= stop_at:
+                        raise FetchError(f"download took longer than {self.deadline} seconds") from e
+                    raise FetchError(str(e)) from e
+                if not chunk:
+                    return bytes(body)
+                body.extend(chunk)
+                if len(body) > self.max_bytes:
+                    raise FetchError(f"response is larger than {self.max_bytes} bytes")
+        finally:
+            # The connection may go back to the pool; don't leave it a nearly spent timeout
+            if sock is not None and sock.fileno() != -1:
+                sock.settimeout(read_timeout)
+
+    def fetch_text(self, url):
+        """Return the paragraph text of ``url``, revalidating any cached copy."""
+        cached = self.cache.get(url) if self.cache else None
+        headers = {}
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        stop_at = time.monotonic() + self.deadline
+        try:
+            with stage("fetch"), self.session.get(url, headers=headers, timeout=self._timeout(), stream=True) as response:
+                if response.status_code == 304 and cached:
+                    return cached["text"]
+                response.raise_for_status()
+                body = self._download(response, stop_at)
+                encoding = _declared_encoding(response)
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+        except requests.RequestException as e:
+            raise FetchError(str(e)) from e
+
+        with stage("extract"):
+            text = extract_text(body, encoding)
+        if self.cache and (etag or last_modified):
+            self.cache.set(url, {"etag": etag, "last_modified": last_modified, "text": text})
+        return text
+
+    def fetch_many(self, urls):
+        """Fetch ``urls`` concurrently, yielding ``(url, text, error)`` in input order."""
+        def fetch_one(url):
+            try:
+                return url, self.fetch_text(url), None
+            except FetchError as e:
+                return url, None, e
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            yield from pool.map(fetch_one, urls)
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,215 @@
+"""Timing and memory instrumentation for the analysis stages.
+
+Wrap a stage in ``stage("parse")`` (or ``stage("summarize", summarizer="LSA")``)
+and every run records its wall time and the change in resident memory.
+The numbers are kept per stage in ``METRICS`` and can be read three ways:
+
+- ``METRICS.snapshot()``: rows for the app's sidebar performance panel.
+- One JSON object per stage run on the ``omnitext.metrics`` logger.
+- ``METRICS.prometheus()``: Prometheus text format, written to a file for
+  the node_exporter textfile collector or served over HTTP.
+
+``configure_from_env()`` sets up the last two from ``OMNITEXT_METRICS_LOG``
+(``-`` for stderr, or a file path), ``OMNITEXT_METRICS_FILE`` and
+``OMNITEXT_METRICS_PORT``. Memory deltas are process-wide, so stages that
+run at the same time see each other's allocations.
+"""
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+logger = logging.getLogger("omnitext.metrics")
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss():
+    """Resident set size of this process in bytes, or None where unknown."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss():
+    """Largest resident set size this process has had, in bytes."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = peak if sys.platform == "darwin" else peak * 1024
+    return max(peak, current_rss() or 0)
+
+
+class _Stats:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.last_seconds = 0.0
+        self.max_rss_delta = 0
+
+
+class Metrics:
+    """Per-stage counters, safe to update from several threads."""
+
+    def __init__(self):
+        self._stats = {}
+        self._lock = threading.Lock()
+        self.prometheus_file = None
+
+    def record(self, name, seconds, rss_delta=None, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = _Stats()
+            stats.count += 1
+            stats.seconds += seconds
+            stats.last_seconds = seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            if rss_delta is not None:
+                stats.max_rss_delta = max(stats.max_rss_delta, rss_delta)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({
+                "event": "stage",
+                "stage": name,
+                **labels,
+                "seconds": round(seconds, 6),
+                "rss_delta_bytes": rss_delta,
+                "rss_bytes": current_rss(),
+                "time": time.time(),
+            }))
+
+    @contextmanager
+    def stage(self, name, **labels):
+        """Time the block and record it under ``name``, also when it raises."""
+        rss_before = current_rss()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            rss_after = current_rss()
+            rss_delta = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+            self.record(name, seconds, rss_delta, **labels)
+
+    def snapshot(self):
+        """One dict per stage and label set, slowest total first."""
+        with self._lock:
+            items = [(key, vars(stats).copy()) for key, stats in self._stats.items()]
+        rows = []
+        for (name, labels), stats in items:
+            label = ", ".join(f"{k}={v}" for k, v in labels)
+            rows.append({
+                "stage": f"{name} ({label})" if label else name,
+                "calls": stats["count"],
+                "total_s": round(stats["seconds"], 3),
+                "mean_s": round(stats["seconds"] / stats["count"], 3),
+                "max_s": round(stats["max_seconds"], 3),
+                "last_s": round(stats["last_seconds"], 3),
+                "max_rss_delta_mb": round(stats["max_rss_delta"] / 2 ** 20, 1),
+            })
+        return sorted(rows, key=lambda row: row["total_s"], reverse=True)
+
+    def prometheus(self):
+        """All counters in the Prometheus text exposition format."""
+        with self._lock:
+            items = [(key, vars(stats).copy()) for key, stats in self._stats.items()]
+        families = [
+            ("omnitext_stage_runs_total", "counter", "Number of times each stage ran.", "count"),
+            ("omnitext_stage_seconds_total", "counter", "Seconds spent in each stage.", "seconds"),
+            ("omnitext_stage_seconds_max", "gauge", "Slowest run of each stage in seconds.", "max_seconds"),
+            ("omnitext_stage_rss_delta_bytes_max", "gauge",
+             "Largest resident memory growth during one run of each stage.", "max_rss_delta"),
+        ]
+        lines = []
+        for metric, kind, help_text, field in families:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for (name, labels), stats in items:
+                label_text = ",".join(
+                    f'{k}="{_escape(v)}"' for k, v in (("stage", name),) + labels
+                )
+                lines.append(f"{metric}{{{label_text}}} {stats[field]}")
+        for metric, value in (("omnitext_process_rss_bytes", current_rss()),
+                              ("omnitext_process_peak_rss_bytes", peak_rss())):
+            if value is not None:
+                lines += [f"# TYPE {metric} gauge", f"{metric} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path=None):
+        """Write ``prometheus()`` to ``path`` (default ``prometheus_file``) atomically."""
+        path = path or self.prometheus_file
+        if not path:
+            return
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(self.prometheus())
+        os.replace(tmp, path)
+
+    def serve(self, port, host="0.0.0.0"):
+        """Serve ``/metrics`` from a daemon thread; returns the HTTP server."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="omnitext-metrics", daemon=True).start()
+        return server
+
+    def clear(self):
+        with self._lock:
+            self._stats.clear()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+METRICS = Metrics()
+stage = METRICS.stage
+
+
+def configure_from_env(metrics=METRICS):
+    """Set up JSON logs, the metrics file and the HTTP endpoint from the environment."""
+    log_target = os.environ.get("OMNITEXT_METRICS_LOG")
+    if log_target:
+        handler = logging.StreamHandler(sys.stderr) if log_target == "-" else logging.FileHandler(log_target)
+        # Each record already is a JSON object
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    metrics.prometheus_file = os.environ.get("OMNITEXT_METRICS_FILE") or metrics.prometheus_file
+    port = os.environ.get("OMNITEXT_METRICS_PORT")
+    if port:
+        return metrics.serve(int(port))
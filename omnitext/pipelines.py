@@ -0,0 +1,124 @@
+"""Task-aware spaCy pipelines.
+
+The app only ever needs entities, sentence boundaries and the lexical
+``is_stop``/``is_alpha`` flags, so instead of running every component of
+``en_core_web_sm`` each analysis uses the smallest pipeline that covers it:
+
+- ``"ner"``: the model's entity recognizer plus a rule-based sentencizer;
+  the tagger, parser, attribute ruler and lemmatizer are never loaded.
+- ``"sentences"``: tokenizer and sentencizer only, no model at all. Enough
+  for summaries, word frequencies and sentiment.
+- ``"tokens"``: tokenizer only, for word frequencies.
+
+Models are not downloaded on demand; provision them up front with
+``omnitext setup`` (or ``python -m spacy download``).
+"""
+from contextlib import contextmanager
+from functools import lru_cache
+
+from .metrics import stage
+
+
+DEFAULT_MODEL = "en_core_web_sm"
+PROFILES = ("ner", "sentences", "tokens")
+# Components that split sentences, cheapest first
+SENTENCE_PIPES = ("sentencizer", "senter", "parser")
+# Everything en_core_web_sm runs that NER doesn't need
+_NER_EXCLUDE = ["tagger", "morphologizer", "parser", "senter", "attribute_ruler", "lemmatizer"]
+
+
+class ModelNotInstalled(OSError):
+    """Raised when a spaCy model hasn't been downloaded."""
+
+
+def download_model(name=DEFAULT_MODEL):
+    from spacy.cli import download
+    from spacy.util import is_package
+
+    if not is_package(name):
+        download(name)
+
+
+def load_pipeline(profile, model=DEFAULT_MODEL):
+    if profile not in PROFILES:
+        raise ValueError(f"unknown pipeline profile {profile!r}, expected one of {PROFILES}")
+    with stage("load_model", profile=profile):
+        return _load_pipeline(profile, model)
+
+
+def _load_pipeline(profile, model):
+    import spacy
+
+    if profile != "ner":
+        nlp = spacy.blank("en")
+        if profile == "sentences":
+            nlp.add_pipe("sentencizer")
+        return nlp
+
+    try:
+        nlp = spacy.load(model, exclude=_NER_EXCLUDE)
+    except OSError as e:
+        raise ModelNotInstalled(
+            f"spaCy model {model!r} is not installed. Run `omnitext setup` "
+            f"or `python -m spacy download {model}` first."
+        ) from e
+    # Rule-based sentence boundaries instead of the dependency parser
+    nlp.add_pipe("sentencizer", first=True)
+    # A shared tok2vec only matters if a component we kept listens to it
+    for name in ("tok2vec", "transformer"):
+        if name in nlp.pipe_names and not _listeners(nlp, name):
+            nlp.remove_pipe(name)
+    return nlp
+
+
+@lru_cache(maxsize=None)
+def get_pipeline(profile, model=DEFAULT_MODEL):
+    """Load a profile once per process."""
+    return load_pipeline(profile, model)
+
+
+def profile_for(entities=False, sentences=False):
+    """Smallest profile that gives entities and/or sentence boundaries."""
+    if entities:
+        return "ner"
+    return "sentences" if sentences else "tokens"
+
+
+def _listeners(nlp, name):
+    return [
+        listener for listener in getattr(nlp.get_pipe(name), "listening_components", [])
+        if listener in nlp.pipe_names
+    ]
+
+
+def needed_pipes(nlp, entities=True, sentences=True):
+    """Names of the components of ``nlp`` needed for entities and/or sentences."""
+    needed = []
+    if entities:
+        needed += [name for name in ("entity_ruler", "ner") if name in nlp.pipe_names]
+    if sentences:
+        needed += [name for name in SENTENCE_PIPES if name in nlp.pipe_names][:1]
+    elif "sentencizer" in nlp.pipe_names:
+        # Costs next to nothing, and keeping it means a profile never has to be modified
+        needed.append("sentencizer")
+    # Plus any shared tok2vec/transformer those components listen to
+    for name in ("tok2vec", "transformer"):
+        if name in nlp.pipe_names and set(_listeners(nlp, name)) & set(needed):
+            needed.append(name)
+    return needed
+
+
+@contextmanager
+def select_pipes(nlp, entities=True, sentences=True):
+    """Run only the components needed for this call, e.g. on a full model.
+
+    Disabling components changes ``nlp`` itself, so when the pipeline
+    already is exactly what's needed (the usual case with a profile) it is
+    left alone and can be shared by concurrent threads.
+    """
+    needed = needed_pipes(nlp, entities, sentences)
+    if set(needed) == set(nlp.pipe_names):
+        yield nlp
+        return
+    with nlp.select_pipes(enable=needed):
+        yield nlp
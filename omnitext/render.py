@@ -0,0 +1,118 @@
+"""Charts, word clouds and entity highlights for the Streamlit app.
+
+Charts are drawn on ``matplotlib.figure.Figure`` objects that pyplot never
+registers, written out as PNG bytes and cleared straight away, so a
+long-running server doesn't pile up figures. Every renderer takes an
+optional ``ResultCache`` and stores its PNG or HTML under a hash of exactly
+what it draws, so the same chart is only rendered once. matplotlib,
+wordcloud and spaCy's displaCy are imported only when something is drawn.
+"""
+import io
+import json
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from .analysis import iter_chunks
+from .metrics import stage
+
+
+# Characters of text per page of the entity highlighter
+PAGE_CHARS = 5_000
+WORDCLOUD_MAX_WORDS = 200
+
+
+def _cached(cache, kind, content, render):
+    if cache is None:
+        return render()
+    payload = json.dumps(content, sort_keys=True, default=list)
+    return cache.get_or_compute(kind, payload, render)
+
+
+@contextmanager
+def _figure(**kwargs):
+    from matplotlib.figure import Figure
+
+    fig = Figure(**kwargs)
+    try:
+        yield fig
+    finally:
+        # Drop every artist now rather than whenever the figure is collected
+        fig.clear()
+
+
+def _png(fig):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", bbox_inches="tight")
+    return buffer.getvalue()
+
+
+def bar_chart(items, title, xlabel="Frequency", cache=None):
+    """Horizontal bar chart of a ``{label: count}`` dict, as PNG bytes."""
+    def render():
+        with stage("render", kind="bar_chart"), _figure() as fig:
+            ax = fig.subplots()
+            ax.barh(list(items.keys()), list(items.values()))
+            ax.set_xlabel(xlabel)
+            ax.set_title(title)
+            fig.tight_layout()
+            return _png(fig)
+
+    return _cached(cache, "bar_chart", [title, xlabel, list(items.items())], render)
+
+
+def word_cloud(frequencies, width=800, height=400, max_words=WORDCLOUD_MAX_WORDS, cache=None):
+    """Word cloud PNG built from an existing ``{word: count}`` table.
+
+    Only the ``max_words`` most frequent words are drawn (and hashed), and
+    the text is never tokenized again.
+    """
+    top_words = dict(sorted(frequencies.items(), key=lambda x: x[1], reverse=True)[:max_words])
+
+    def render():
+        from wordcloud import WordCloud
+
+        if not top_words:
+            return None
+        with stage("wordcloud"):
+            cloud = WordCloud(width=width, height=height, max_words=max_words, background_color="white")
+            buffer = io.BytesIO()
+            cloud.generate_from_frequencies(top_words).to_image().save(buffer, format="PNG")
+            return buffer.getvalue()
+
+    return _cached(cache, "word_cloud", [width, height, list(top_words.items())], render)
+
+
+def entity_pages(text, page_chars=PAGE_CHARS):
+    """``(start, end)`` offsets of the pages of ``text``, cut at paragraph or sentence ends."""
+    pages = []
+    start = 0
+    for page in iter_chunks(text, page_chars):
+        pages.append((start, start + len(page)))
+        start += len(page)
+    return pages or [(0, 0)]
+
+
+def entity_html(text, spans, start, end, cache=None):
+    """displaCy markup for ``text[start:end]``.
+
+    ``spans`` are sorted ``(start, end, label)`` character offsets into the
+    whole text, so any page of a long document can be highlighted without its
+    ``Doc``.
+    """
+    page = text[start:end]
+    # Spans are sorted and don't overlap, so only the one before ``first`` can reach in
+    first = max(bisect_left(spans, (start,)) - 1, 0)
+    last = bisect_left(spans, (end,))
+    ents = [
+        {"start": max(s, start) - start, "end": min(e, end) - start, "label": label}
+        for s, e, label in spans[first:last]
+        if e > start
+    ]
+
+    def render():
+        from spacy import displacy
+
+        with stage("render", kind="entity_html"):
+            return displacy.render({"text": page, "ents": ents}, style="ent", manual=True)
+
+    return _cached(cache, "entity_html", [page, ents], render)
@@ -0,0 +1,117 @@
+"""Run independent analysis stages concurrently.
+
+Entities, summaries, word clouds, word counts and sentiment all derive from
+one parse and don't depend on each other, so a ``StageRun`` submits them to
+a thread pool together and hands each result back as soon as it is ready.
+Threads rather than processes because the stages share the parsed text in
+memory; the expensive parts (sparse matrix products, image encoding) run in
+NumPy, SciPy and PIL code that releases the GIL.
+
+Stages that need the parse are chained after a stage that does it, so
+they don't each take a thread from the pool just to wait for it.
+
+Stage functions only compute values; whoever consumes ``results()`` does
+the displaying, which keeps Streamlit calls on the script thread.
+"""
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+
+class Cancelled(Exception):
+    """Raised inside a stage whose run has been cancelled."""
+
+
+def make_executor(max_workers=4):
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="omnitext-stage")
+
+
+class StageRun:
+    """One set of concurrently running stages.
+
+    Pass a shared ``executor`` to bound concurrency across runs, otherwise
+    the run gets its own pool. Used as a context manager, any exception
+    while consuming results (including Streamlit stopping the script because
+    the user changed the input) cancels the stages still waiting and sets
+    ``cancelled`` so running ones can stop at their next check.
+    """
+
+    def __init__(self, executor=None, max_workers=4):
+        self.cancelled = threading.Event()
+        self._own_executor = executor is None
+        self._executor = executor or make_executor(max_workers)
+        self._futures = {}
+        self._by_name = {}
+
+    def submit(self, name, compute, *args, after=None, **kwargs):
+        """Run ``compute(*args, **kwargs)`` as the stage ``name``.
+
+        With ``after``, the name of a stage submitted earlier, it only starts
+        once that stage has finished, and fails with its error if it failed.
+        """
+        if after is None:
+            future = self._executor.submit(compute, *args, **kwargs)
+        else:
+            future = Future()
+            self._by_name[after].add_done_callback(
+                lambda dependency: self._start(future, dependency, compute, args, kwargs)
+            )
+        self._futures[future] = name
+        self._by_name[name] = future
+
+    def _start(self, future, dependency, compute, args, kwargs):
+        # Called by whichever thread finished the dependency
+        if future.cancelled():
+            return
+        if dependency.cancelled():
+            future.cancel()
+        elif dependency.exception() is not None:
+            future.set_exception(dependency.exception())
+        else:
+            self._executor.submit(_run, future, compute, args, kwargs)
+
+    def check(self):
+        """Raise ``Cancelled`` if the run has been cancelled."""
+        if self.cancelled.is_set():
+            raise Cancelled()
+
+    def results(self, poll=0.25, on_wait=None):
+        """Yield ``(name, result, error)`` for each stage in the order they finish.
+
+        While stages are still running ``on_wait(done, total)`` is called
+        every ``poll`` seconds.
+        """
+        pending = set(self._futures)
+        total = len(pending)
+        while pending:
+            finished, pending = wait(pending, timeout=poll, return_when=FIRST_COMPLETED)
+            for future in finished:
+                error = future.exception()
+                yield self._futures[future], None if error else future.result(), error
+            if pending and on_wait is not None:
+                on_wait(total - len(pending), total)
+
+    def cancel(self):
+        self.cancelled.set()
+        for future in list(self._futures):
+            future.cancel()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.cancel()
+        if self._own_executor:
+            self._executor.shutdown(wait=exc_type is None)
+
+
+def _run(future, compute, args, kwargs):
+    # What the executor does for its own futures, for a chained stage's future
+    if not future.set_running_or_notify_cancel():
+        return
+    try:
+        result = compute(*args, **kwargs)
+    except BaseException as e:
+        future.set_exception(e)
+    else:
+        future.set_result(result)
@@ -0,0 +1,231 @@
+"""Vectorized LexRank, TextRank and LSA summarizers.
+
+These reproduce sumy's scoring (same normalization, stemming, stop words,
+thresholds and convergence rules) but build the sentence/term matrix once
+as a SciPy sparse matrix, compute all sentence similarities with one sparse
+product and run the power iteration as sparse matrix-vector products. That
+replaces sumy's pure Python O(sentences²) loops, so documents with thousands
+of sentences summarize in a fraction of a second.
+
+They work on the ``(text, words)`` sentence pairs produced by
+``analysis.sentence_words``, i.e. on the spaCy sentence boundaries.
+"""
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import LinearOperator, svds
+
+
+LEXRANK_THRESHOLD = 0.1
+LEXRANK_EPSILON = 0.1
+TEXTRANK_EPSILON = 1e-4
+TEXTRANK_DAMPING = 0.85
+# sumy adds this to TextRank's row sums to avoid dividing by zero
+TEXTRANK_ZERO_DIVISION_PREVENTION = 1e-7
+LSA_SMOOTH = 0.4
+# Give up on a power iteration that hasn't converged after this many steps
+MAX_ITERATIONS = 1000
+
+
+class _Terms:
+    """Stems and stop words for one language, with stems memoized per word."""
+
+    def __init__(self, language="english"):
+        from sumy.nlp.stemmers import Stemmer
+        from sumy.utils import get_stop_words
+
+        self._stemmer = Stemmer(language)
+        self.stop_words = frozenset(word.lower() for word in get_stop_words(language))
+        self._stems = {}
+
+    def stem(self, word):
+        stem = self._stems.get(word)
+        if stem is None:
+            stem = self._stems[word] = self._stemmer(word)
+        return stem
+
+
+_terms = {}
+
+
+def _get_terms(language):
+    if language not in _terms:
+        _terms[language] = _Terms(language)
+    return _terms[language]
+
+
+def term_matrix(sentences, terms, count_stop_words=False):
+    """Sparse sentences × terms matrix of stemmed word counts.
+
+    Stop words never define a term. With ``count_stop_words`` a stop word
+    whose stem matches a term is still counted, as sumy's LSA does.
+    """
+    words = [[word.lower() for word in sentence_words] for _, sentence_words in sentences]
+    vocabulary = {}
+    for sentence in words:
+        for word in sentence:
+            if word not in terms.stop_words:
+                vocabulary.setdefault(terms.stem(word), len(vocabulary))
+
+    rows, cols = [], []
+    for row, sentence in enumerate(words):
+        for word in sentence:
+            if not count_stop_words and word in terms.stop_words:
+                continue
+            col = vocabulary.get(terms.stem(word))
+            if col is not None:
+                rows.append(row)
+                cols.append(col)
+    counts = sp.coo_matrix(
+        (np.ones(len(rows)), (rows, cols)), shape=(len(sentences), len(vocabulary))
+    )
+    # Duplicate (row, col) pairs are summed into counts
+    return counts.tocsr()
+
+
+def _row_scale(matrix, factors):
+    return sp.diags(factors) @ matrix
+
+
+def _row_max(matrix):
+    # SciPy can't reduce a matrix without columns, i.e. a text without terms
+    if matrix.shape[1] == 0:
+        return np.zeros(matrix.shape[0])
+    return matrix.max(axis=1).toarray().ravel()
+
+
+def _entry_rows(matrix):
+    """Row index of every stored entry of a CSR matrix."""
+    return np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+
+
+def lexrank_scores(counts, threshold=LEXRANK_THRESHOLD, epsilon=LEXRANK_EPSILON):
+    sentences_count = counts.shape[0]
+    # TF normalized by the most frequent term in each sentence
+    max_tf = _row_max(counts)
+    max_tf[max_tf == 0] = 1
+    tf = _row_scale(counts, 1.0 / max_tf)
+    # Each sentence counts as a document for IDF
+    document_frequency = np.diff(counts.tocsc().indptr)
+    idf = np.log(sentences_count / (1.0 + document_frequency))
+
+    weighted = (tf @ sp.diags(idf)).tocsr()
+    norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+    # Cosine similarity of every sentence pair sharing a term, in one product;
+    # the result is turned into the degree-normalized adjacency matrix in place
+    graph = (weighted @ weighted.T).tocsr()
+    rows = _entry_rows(graph)
+    denominator = norms[rows] * norms[graph.indices]
+    # cosine > threshold, without dividing; sentences without terms never link
+    graph.data = ((graph.data > threshold * denominator) & (denominator > 0)).astype(float)
+    degrees = np.bincount(rows, weights=graph.data, minlength=sentences_count)
+    degrees[degrees == 0] = 1
+    graph.data /= degrees[rows]
+    transition = graph.T
+
+    scores = np.full(sentences_count, 1.0 / sentences_count)
+    for _ in range(MAX_ITERATIONS):
+        next_scores = transition @ scores
+        norm = np.linalg.norm(next_scores)
+        if norm == 0:
+            return next_scores
+        next_scores /= norm
+        delta = np.linalg.norm(next_scores - scores)
+        scores = next_scores
+        if delta <= epsilon:
+            break
+    return scores
+
+
+def textrank_scores(counts, damping=TEXTRANK_DAMPING, epsilon=TEXTRANK_EPSILON):
+    sentences_count = counts.shape[0]
+    # Edge weight: shared word occurrences over the sum of log sentence lengths
+    graph = (counts @ counts.T).tocsr()
+    rows = _entry_rows(graph)
+    log_lengths = np.log(np.maximum(np.asarray(counts.sum(axis=1)).ravel(), 1))
+    norm = log_lengths[rows] + log_lengths[graph.indices]
+    single_words = np.isclose(norm, 0.0)
+    graph.data = np.where(single_words, graph.data, graph.data / np.where(single_words, 1, norm))
+    row_sums = np.bincount(rows, weights=graph.data, minlength=sentences_count)
+    graph.data /= (row_sums + TEXTRANK_ZERO_DIVISION_PREVENTION)[rows]
+    transition = graph.T
+
+    # sumy's dense matrix is (1 - d) / N everywhere plus d * weights; apply
+    # that without materializing the N × N teleport term
+    teleport = (1.0 - damping) / sentences_count
+    scores = np.full(sentences_count, 1.0 / sentences_count)
+    for _ in range(MAX_ITERATIONS):
+        next_scores = teleport * scores.sum() + damping * (transition @ scores)
+        delta = np.linalg.norm(next_scores - scores)
+        scores = next_scores
+        if delta <= epsilon:
+            break
+    return scores
+
+
+def lsa_scores(counts, dimensions=None, smooth=LSA_SMOOTH):
+    """LSA sentence scores from the smoothed TF matrix.
+
+    sumy keeps every singular value, and with all of them the score of a
+    sentence, sqrt(sum_k sigma_k² v_kj²), is exactly the norm of its TF
+    column, so that's computed directly. Pass ``dimensions`` to keep only
+    the top singular values instead; those come from a truncated sparse SVD
+    that never densifies the matrix.
+    """
+    sentences_count, terms_count = counts.shape
+    max_tf = _row_max(counts)
+    has_terms = (max_tf > 0).astype(float)
+    max_tf[max_tf == 0] = 1
+    # Every cell of a sentence with any terms is smooth + (1 - smooth) * tf / max_tf
+    scaled = _row_scale(counts, (1.0 - smooth) / max_tf).tocsr()
+
+    if dimensions is None or dimensions >= min(sentences_count, terms_count):
+        # Cells without the term hold just ``smooth``; the others add it to the scaled tf
+        present = scaled.copy()
+        present.data = (smooth + present.data) ** 2
+        absent = terms_count - np.diff(scaled.indptr)
+        squares = smooth ** 2 * absent + np.asarray(present.sum(axis=1)).ravel()
+        return np.sqrt(squares * has_terms)
+
+    # smoothed = smooth * has_terms · 1ᵀ + scaled, as an implicit operator
+    operator = LinearOperator(
+        (sentences_count, terms_count),
+        matvec=lambda x: smooth * has_terms * np.sum(x) + scaled @ np.ravel(x),
+        rmatvec=lambda y: smooth * np.dot(has_terms, np.ravel(y)) * np.ones(terms_count) + scaled.T @ np.ravel(y),
+        dtype=float,
+    )
+    u, sigma, _ = svds(operator, k=dimensions)
+    return np.sqrt((u ** 2) @ (sigma ** 2))
+
+
+def rank_sentences(sentences, summarizer_type, language="english", lsa_dimensions=None):
+    """Score every sentence, or return None where sumy picks no sentences at all.
+
+    That is LSA on a text without a single term (only stop words and
+    numbers); LexRank and TextRank still rank such sentences, all equally.
+    """
+    terms = _get_terms(language)
+    if summarizer_type == "LexRank":
+        return lexrank_scores(term_matrix(sentences, terms))
+    if summarizer_type == "TextRank":
+        return textrank_scores(term_matrix(sentences, terms))
+    if summarizer_type == "LSA":
+        counts = term_matrix(sentences, terms, count_stop_words=True)
+        if counts.shape[1] == 0:
+            return None
+        return lsa_scores(counts, lsa_dimensions)
+    raise ValueError(f"no built-in {summarizer_type} summarizer")
+
+
+def summarize(sentences, summarizer_type, sentences_count, language="english"):
+    """Pick the ``sentences_count`` best rated sentences, in document order."""
+    if not sentences:
+        return ""
+    scores = rank_sentences(sentences, summarizer_type, language)
+    if scores is None:
+        return ""
+    # Stable sort keeps document order among equal scores, like sumy
+    best = np.sort(np.argsort(-scores, kind="stable")[:sentences_count])
+    return " ".join(sentences[i][0] for i in best)
+
+
+SUMMARIZERS = ("LexRank", "TextRank", "LSA")
@@ -1,2 +1,5 @@
 #!/bin/bash
-python -m spacy download en_core_web_sm
+# Install the dependencies and the spaCy model before the app first starts
+set -e
+pip install -r requirements.txt
+python -m omnitext setup
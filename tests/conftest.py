@@ -0,0 +1,20 @@
+import pytest
+
+
+ENTITY_PATTERNS = [
+    {"label": "PERSON", "pattern": "Alice Moreno"},
+    {"label": "ORG", "pattern": "Harbor Electronics"},
+    {"label": "GPE", "pattern": "Paris"},
+    {"label": "GPE", "pattern": "Spain"},
+]
+
+
+@pytest.fixture(scope="session")
+def nlp():
+    """A small rule-based pipeline with entities and sentences, so no model is needed."""
+    import spacy
+
+    nlp = spacy.blank("en")
+    nlp.add_pipe("sentencizer")
+    nlp.add_pipe("entity_ruler").add_patterns(ENTITY_PATTERNS)
+    return nlp
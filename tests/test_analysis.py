@@ -0,0 +1,101 @@
+import os
+
+import pytest
+from textblob import TextBlob
+
+import omnitext
+from omnitext.analysis import AnalyzedText, iter_chunks
+from omnitext.cache import ResultCache
+
+
+SENTIMENT_TEXTS = [
+    "The movie wasn't bad at all, it's amazing.",
+    "I do not really like it. It is not a good film!",
+    "Very very happy :) but somewhat tired...",
+]
+
+
+@pytest.mark.parametrize("text", SENTIMENT_TEXTS)
+def test_sentiment_matches_textblob(nlp, text):
+    expected = TextBlob(text).sentiment
+    assert omnitext.sentiment(text) == pytest.approx(tuple(expected))
+    assert AnalyzedText(nlp, text).sentiment == pytest.approx(tuple(expected))
+
+
+ARTICLES = os.path.join(os.path.dirname(__file__), os.pardir, "benchmarks", "fixtures", "articles.txt")
+
+
+@pytest.fixture(scope="module")
+def articles():
+    with open(ARTICLES, encoding="utf-8") as f:
+        text = f.read()
+    # Mention the entities the test pipeline knows about
+    return text.replace("Riverside", "Alice Moreno").replace("Harbor Electronics", "Harbor Electronics in Paris")
+
+
+@pytest.mark.parametrize("max_chars", [1, 7, 80, 500, 4096])
+@pytest.mark.parametrize("text", [
+    "",
+    "no breaks at all in this long sentence of words",
+    "Word" * 50,
+    "First paragraph.\n\n  \nSecond one! Third?\tFourth...\r\n\r\nFifth.",
+])
+def test_iter_chunks_covers_text(text, max_chars):
+    chunks = list(iter_chunks(text, max_chars))
+    assert "".join(chunks) == text
+    assert all(0 < len(chunk) <= max_chars for chunk in chunks)
+
+
+def test_iter_chunks_prefers_paragraphs_then_sentences(articles):
+    for chunk in list(iter_chunks(articles, 2000))[:-1]:
+        assert chunk.endswith("\n\n")
+    text = "One sentence. Two sentence. Three sentence."
+    assert list(iter_chunks(text, 30)) == ["One sentence. Two sentence. ", "Three sentence."]
+
+
+@pytest.mark.parametrize("chunk_chars", [300, 1000, 2500])
+def test_chunked_parse_matches_single_pass(nlp, articles, chunk_chars):
+    chunked = AnalyzedText(nlp, articles, chunk_chars=chunk_chars)
+    single = AnalyzedText(nlp, articles, chunk_chars=len(articles))
+    assert chunked.is_chunked and not single.is_chunked
+    assert chunked._aggregate.chunks > 1
+
+    assert chunked.entity_spans == single.entity_spans
+    assert chunked.entities == single.entities
+    assert chunked.words == single.words
+    assert chunked.sentiment == pytest.approx(tuple(single.sentiment))
+    assert chunked.sentiment == pytest.approx(tuple(TextBlob(articles).sentiment))
+
+
+def test_entity_spans_point_into_the_text(nlp, articles):
+    text = "\n\n".join([articles] * 3)
+    analyzed = AnalyzedText(nlp, text, chunk_chars=700)
+    spans = analyzed.entity_spans
+    assert len(spans) == sum(analyzed.entities.values()) == 21
+    for start, end, label in spans:
+        assert (text[start:end], label) in analyzed.entities
+    assert [start for start, _, _ in spans] == sorted(start for start, _, _ in spans)
+
+
+def test_changing_summary_settings_doesnt_parse_again(nlp, articles):
+    cache = ResultCache()
+    first = AnalyzedText(nlp, articles, cache=cache).load()
+    lsa = first.summarize("LSA", 3)
+
+    second = AnalyzedText(nlp, articles, cache=cache)
+    second._parse = lambda: pytest.fail("the text was parsed again")
+    assert second.load().summarize("LSA", 3) == lsa
+    assert second.summarize("LexRank", 2) == first.summarize("LexRank", 2)
+
+
+def test_sentiment_doesnt_need_the_parse(nlp):
+    analyzed = AnalyzedText(nlp, "What a wonderful, happy day.")
+    analyzed._parse = lambda: pytest.fail("sentiment waited for the parse")
+    assert analyzed.sentiment.polarity > 0.5
+
+
+def test_no_doc_is_kept_after_the_parse(nlp, articles):
+    from spacy.tokens import Doc
+
+    analyzed = AnalyzedText(nlp, articles, chunk_chars=1000).load()
+    assert not any(isinstance(value, Doc) for value in vars(analyzed._aggregate).values())
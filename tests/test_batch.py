@@ -0,0 +1,131 @@
+import gc
+import io
+import json
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from omnitext import batch
+from omnitext.batch import iter_documents, run_batch
+
+
+def _upload(name, data):
+    stream = io.BytesIO(data)
+    stream.name = name
+    return stream
+
+
+UPLOADS = {
+    "u.csv": 'id,text\r\na,"First line\r\nsecond line"\r\nb,Café\r\n'.encode("utf-8"),
+    "u.jsonl": (json.dumps({"id": "a", "text": "First line\nsecond line"}) + "\n\n"
+                + json.dumps({"id": "b", "text": "Café"}) + "\n").encode("utf-8"),
+}
+
+
+@pytest.mark.parametrize("name", sorted(UPLOADS))
+def test_upload_can_be_read_twice(name):
+    # The app counts the documents in an upload first, then analyzes them
+    upload = _upload(name, UPLOADS[name])
+    expected = [("a", "First line\r\nsecond line" if name.endswith(".csv") else "First line\nsecond line"),
+                ("b", "Café")]
+    assert [(doc_id, text) for doc_id, text, _ in iter_documents(upload)] == expected
+    gc.collect()
+    upload.seek(0)
+    assert [(doc_id, text) for doc_id, text, _ in iter_documents(upload)] == expected
+
+
+def test_abandoned_iteration_leaves_upload_open():
+    upload = _upload("u.csv", UPLOADS["u.csv"])
+    documents = iter_documents(upload)
+    next(documents)
+    del documents
+    gc.collect()
+    assert not upload.closed
+
+
+def test_zip_members(tmp_path):
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, "w") as archive:
+        archive.writestr("docs/one.txt", "One.")
+        archive.writestr("docs/rows.jsonl", UPLOADS["u.jsonl"])
+        archive.writestr("docs/image.png", b"\x89PNG")
+    upload = _upload("corpus.zip", data.getvalue())
+    assert [doc_id for doc_id, _, _ in iter_documents(upload)] == ["docs/one.txt", "a", "b"]
+    upload.seek(0)
+    assert len(list(iter_documents(upload))) == 3
+
+
+def test_missing_ids_fall_back_to_position(tmp_path):
+    path = tmp_path / "rows.csv"
+    path.write_text("text\nalpha\nbeta\n", encoding="utf-8")
+    assert list(iter_documents(str(path))) == [("rows.csv:0", "alpha", None), ("rows.csv:1", "beta", None)]
+
+
+class ListWriter:
+    def __init__(self):
+        self.records = []
+
+    def write(self, record):
+        self.records.append(record)
+
+
+def _run(documents, nlp, **kwargs):
+    writer = ListWriter()
+    count = run_batch(documents, nlp, writer, workers=1, **kwargs)
+    assert count == len(writer.records)
+    return writer.records
+
+
+def test_malformed_lines_are_reported_and_skipped(nlp):
+    data = "\n".join([
+        json.dumps({"id": "a", "text": "Alice Moreno flew to Paris. It was lovely."}),
+        '{"id": "b", "text": ',
+        "[1, 2]",
+        json.dumps({"id": "c", "text": 42}),
+        json.dumps({"id": "d", "text": "Harbor Electronics grew. Spain agreed."}),
+    ]).encode("utf-8")
+    records = _run(iter_documents(_upload("u.jsonl", data)), nlp, sentences_count=1)
+    assert [record["id"] for record in records] == ["a", "u.jsonl:1", "u.jsonl:2", "c", "d"]
+    assert [bool(record.get("error")) for record in records] == [False, True, True, True, False]
+    assert records[1]["error"].startswith("invalid JSON")
+    assert {"text": "Paris", "label": "GPE", "count": 1} in records[0]["entities"]
+    assert records[4]["summary"]
+
+
+def _explode(*args):
+    raise RuntimeError("worker failed")
+
+
+def test_worker_errors_are_recorded(nlp, monkeypatch):
+    # A thread pool stands in for the process pool so the patched worker is used
+    monkeypatch.setattr(batch, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(batch, "_summarize_and_score", _explode)
+    documents = [("a", "One sentence.", None), ("b", "Another one.", None)]
+    records = _run(documents, nlp)
+    assert [record["error"] for record in records] == ["RuntimeError: worker failed"] * 2
+    assert all("summary" not in record for record in records)
+
+
+def test_summaries_can_be_skipped(nlp):
+    documents = [("a", "Alice Moreno flew to Paris. She liked it a lot.", None)]
+    records = _run(documents, nlp, summarizer_type=None, entity_types=["PERSON"])
+    assert records[0]["summary"] is None
+    assert records[0]["entities"] == [{"text": "Alice Moreno", "label": "PERSON", "count": 1}]
+    assert records[0]["polarity"] == pytest.approx(0.6)
+
+
+def test_byte_order_mark_is_ignored():
+    data = "\ufefftext,id\nHello world.,x\n".encode("utf-8")
+    assert list(iter_documents(_upload("excel.csv", data))) == [("x", "Hello world.", None)]
+    data = ("\ufeff" + json.dumps({"id": "x", "text": "Hello."}) + "\n").encode("utf-8")
+    assert list(iter_documents(_upload("u.jsonl", data))) == [("x", "Hello.", None)]
+
+
+def test_missing_text_column_is_reported():
+    upload = _upload("u.csv", b"id,body\na,Hello\nb,World\n")
+    [(doc_id, text, error)] = iter_documents(upload)
+    assert doc_id == "u.csv" and text == ""
+    assert error == "no 'text' column (columns: id, body)"
+    upload.seek(0)
+    assert [text for _, text, _ in iter_documents(upload, text_field="body")] == ["Hello", "World"]
@@ -0,0 +1,135 @@
+import multiprocessing
+
+import pytest
+
+from omnitext import cache as cache_module
+from omnitext.cache import DiskBackend, MemoryBackend, ResultCache, make_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controls the time the cache sees."""
+    class Clock:
+        now = 1_000_000.0
+
+    monkeypatch.setattr(cache_module.time, "time", lambda: Clock.now)
+    return Clock
+
+
+def test_key_depends_on_stage_text_and_settings():
+    key = make_key("summary", "text", summarizer="LSA", sentences=3)
+    assert key == make_key("summary", "text", sentences=3, summarizer="LSA")
+    assert key != make_key("summary", "text", summarizer="LSA", sentences=4)
+    assert key != make_key("summary", "other", summarizer="LSA", sentences=3)
+    assert key != make_key("sentiment", "text", summarizer="LSA", sentences=3)
+
+
+def test_memory_evicts_least_recently_used():
+    backend = MemoryBackend(maxsize=2)
+    backend.set("a", 1)
+    backend.set("b", 2)
+    assert backend.get("a", None)[1] == 1  # "b" is now the oldest
+    backend.set("c", 3)
+    assert backend.get("b", None) is None
+    assert backend.get("a", None)[1] == 1
+    assert backend.get("c", None)[1] == 3
+
+
+def test_disk_evicts_least_recently_used(tmp_path, clock):
+    backend = DiskBackend(str(tmp_path), maxsize=2)
+    for key in ("a", "b"):
+        clock.now += 1
+        backend.set(key, key.upper())
+    clock.now += 1
+    assert backend.get("a", None)[1] == "A"
+    clock.now += 1
+    backend.set("c", "C")
+    assert backend.get("b", None) is None
+    assert backend.get("a", None)[1] == "A"
+    assert backend.get("c", None)[1] == "C"
+
+
+@pytest.mark.parametrize("on_disk", [False, True])
+def test_entries_expire_after_ttl(tmp_path, clock, on_disk):
+    cache = ResultCache(ttl=60, directory=str(tmp_path) if on_disk else None)
+    calls = []
+
+    def compute():
+        calls.append(clock.now)
+        return len(calls)
+
+    assert cache.get_or_compute("words", "text", compute) == 1
+    clock.now += 59
+    assert cache.get_or_compute("words", "text", compute) == 1
+    clock.now += 2
+    assert cache.get_or_compute("words", "text", compute) == 2
+    assert len(calls) == 2
+
+
+def test_expired_disk_entry_is_removed(tmp_path, clock):
+    backend = DiskBackend(str(tmp_path))
+    backend.set("a", 1)
+    clock.now += 10
+    assert backend.get("a", ttl=5) is None
+    assert backend.get("a", ttl=None) is None
+
+
+@pytest.mark.parametrize("on_disk", [False, True])
+def test_none_results_are_cached(tmp_path, on_disk):
+    # An empty text has no word cloud; that answer is cached like any other
+    cache = ResultCache(directory=str(tmp_path) if on_disk else None)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return None
+
+    assert cache.get_or_compute("wordcloud", "", compute) is None
+    assert cache.get_or_compute("wordcloud", "", compute) is None
+    assert len(calls) == 1
+    if on_disk:
+        fresh = ResultCache(directory=str(tmp_path))
+        assert fresh.get_or_compute("wordcloud", "", compute) is None
+        assert len(calls) == 1
+
+
+def test_disk_hit_fills_memory(tmp_path):
+    ResultCache(directory=str(tmp_path)).set("key", {"value": 1})
+    cache = ResultCache(directory=str(tmp_path))
+    assert cache.get("key")[1] == {"value": 1}
+    assert cache.memory.get("key", None)[1] == {"value": 1}
+
+
+def test_clear_empties_both_stores(tmp_path):
+    cache = ResultCache(directory=str(tmp_path))
+    cache.set("key", 1)
+    cache.clear()
+    assert cache.get("key") is None
+    assert ResultCache(directory=str(tmp_path)).get("key") is None
+
+
+def _share(directory, stage, text, value, queue):
+    cache = ResultCache(directory=directory)
+    queue.put(cache.get_or_compute(stage, text, lambda: value))
+
+
+def test_disk_store_is_shared_between_processes(tmp_path):
+    directory = str(tmp_path)
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+
+    # A result computed in another process is found here...
+    process = context.Process(target=_share, args=(directory, "summary", "text", "from child", queue))
+    process.start()
+    assert queue.get(timeout=60) == "from child"
+    process.join()
+    cache = ResultCache(directory=directory)
+    assert cache.get_or_compute("summary", "text", lambda: "from parent") == "from child"
+
+    # ...and one computed here is found by another process
+    cache.get_or_compute("sentiment", "text", lambda: (0.5, 0.25))
+    process = context.Process(target=_share, args=(directory, "sentiment", "text", "from child", queue))
+    process.start()
+    assert queue.get(timeout=60) == (0.5, 0.25)
+    process.join()
+    assert process.exitcode == 0
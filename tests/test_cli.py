@@ -0,0 +1,24 @@
+import json
+
+from omnitext import cli
+
+
+def _records(capsys):
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+def test_unreadable_files_are_reported(tmp_path, capsys):
+    good = tmp_path / "good.txt"
+    good.write_text("What a wonderful day.", encoding="utf-8")
+    binary = tmp_path / "binary.txt"
+    binary.write_bytes(b"\xff\xfe\x00bad")
+    missing = tmp_path / "missing.txt"
+
+    cli.main(["sentiment", str(missing), str(good), str(binary), str(tmp_path)])
+    records = _records(capsys)
+
+    assert [record["source"] for record in records] == [str(missing), str(good), str(binary), str(tmp_path)]
+    assert "No such file" in records[0]["error"]
+    assert records[1]["polarity"] == 1.0 and "error" not in records[1]
+    assert "utf-8" in records[2]["error"]
+    assert "directory" in records[3]["error"]
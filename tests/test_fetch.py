@@ -0,0 +1,124 @@
+import gzip
+import http.server
+import threading
+import time
+
+import pytest
+
+from omnitext.fetch import Fetcher, FetchError
+
+
+CAFE = "<html><body><p>Café ok, naïve señor</p></body></html>"
+ETAG = '"v1"'
+LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+PAGE = b"<html><body><p>Hello <b>world</b>.</p><div>menu</div><p>Second paragraph.</p></body></html>"
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _headers(self, **headers):
+        self.send_response(200)
+        for name, value in headers.items():
+            self.send_header(name.replace("_", "-"), value)
+        self.end_headers()
+
+    def do_GET(self):
+        try:
+            if self.path in ("/utf-8", "/iso-8859-1"):
+                body = CAFE.encode(self.path[1:])
+                self._headers(Content_Length=str(len(body)), Content_Type=f"text/html; charset={self.path[1:]}")
+                self.wfile.write(body)
+            elif self.path in ("/etag", "/last-modified"):
+                if (self.headers.get("If-None-Match") == ETAG
+                        or self.headers.get("If-Modified-Since") == LAST_MODIFIED):
+                    self.server.not_modified.append(self.path)
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                validator = {"ETag": ETAG} if self.path == "/etag" else {"Last_Modified": LAST_MODIFIED}
+                body = CAFE.encode("utf-8")
+                self._headers(Content_Length=str(len(body)), Content_Type="text/html; charset=utf-8", **validator)
+                self.wfile.write(body)
+            elif self.path == "/page":
+                self._headers(Content_Length=str(len(PAGE)))
+                self.wfile.write(PAGE)
+            elif self.path == "/gzip":
+                body = gzip.compress(PAGE)
+                self._headers(Content_Length=str(len(body)), Content_Encoding="gzip")
+                self.wfile.write(body)
+            elif self.path == "/chunked":
+                self._headers(Transfer_Encoding="chunked")
+                for part in (PAGE[:20], PAGE[20:]):
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(part), part))
+                self.wfile.write(b"0\r\n\r\n")
+            elif self.path == "/trickle":
+                # One byte at a time, each well within the read timeout
+                self._headers(Content_Length=str(len(PAGE)))
+                for byte in PAGE:
+                    self.wfile.write(bytes([byte]))
+                    self.wfile.flush()
+                    time.sleep(0.1)
+            elif self.path == "/slow-headers":
+                time.sleep(3)
+                self._headers(Content_Length=str(len(PAGE)))
+                self.wfile.write(PAGE)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+@pytest.fixture(scope="module")
+def httpd():
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.daemon_threads = True
+    httpd.not_modified = []
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+
+
+@pytest.fixture(scope="module")
+def server(httpd):
+    return f"http://127.0.0.1:{httpd.server_address[1]}"
+
+
+@pytest.mark.parametrize("path", ["/page", "/gzip", "/chunked"])
+def test_fetch_text(server, path):
+    fetcher = Fetcher()
+    assert fetcher.fetch_text(server + path) == "Hello world. Second paragraph."
+    # The pooled connection is reused with a normal timeout afterwards
+    assert fetcher.fetch_text(server + path) == "Hello world. Second paragraph."
+
+
+@pytest.mark.parametrize("path", ["/trickle", "/slow-headers"])
+def test_deadline_covers_slow_servers(server, path):
+    fetcher = Fetcher(timeout=(5, 15), deadline=1)
+    started = time.monotonic()
+    with pytest.raises(FetchError):
+        fetcher.fetch_text(server + path)
+    assert time.monotonic() - started < 1.5
+
+
+def test_size_limit(server):
+    with pytest.raises(FetchError, match="limit"):
+        Fetcher(max_bytes=10).fetch_text(server + "/page")
+
+
+@pytest.mark.parametrize("charset", ["utf-8", "iso-8859-1"])
+def test_declared_charset_is_used(server, charset):
+    # Neither page has a <meta charset>; only the Content-Type header says
+    assert Fetcher().fetch_text(f"{server}/{charset}") == "Café ok, naïve señor"
+
+
+@pytest.mark.parametrize("path", ["/etag", "/last-modified"])
+def test_cached_text_is_revalidated(httpd, server, tmp_path, path):
+    url = server + path
+    assert Fetcher(cache_dir=str(tmp_path)).fetch_text(url) == "Café ok, naïve señor"
+    assert httpd.not_modified.count(path) == 0
+
+    # A new fetcher with the same cache sends the validator and gets a 304
+    assert Fetcher(cache_dir=str(tmp_path)).fetch_text(url) == "Café ok, naïve señor"
+    assert httpd.not_modified.count(path) == 1
@@ -0,0 +1,107 @@
+import pytest
+
+from omnitext.pipelines import (
+    ModelNotInstalled,
+    load_pipeline,
+    needed_pipes,
+    profile_for,
+    select_pipes,
+)
+
+
+def _ner_profile():
+    # What the "ner" profile looks like, with a rule-based entity component
+    import spacy
+
+    nlp = spacy.blank("en")
+    nlp.add_pipe("sentencizer")
+    nlp.add_pipe("entity_ruler").add_patterns([{"label": "GPE", "pattern": "Paris"}])
+    return nlp
+
+
+def test_profile_for():
+    assert profile_for(entities=True) == "ner"
+    assert profile_for(entities=True, sentences=True) == "ner"
+    assert profile_for(sentences=True) == "sentences"
+    assert profile_for() == "tokens"
+
+
+def test_blank_profiles():
+    assert load_pipeline("sentences").pipe_names == ["sentencizer"]
+    assert load_pipeline("tokens").pipe_names == []
+    with pytest.raises(ValueError):
+        load_pipeline("everything")
+
+
+def test_missing_model():
+    with pytest.raises(ModelNotInstalled, match="omnitext setup"):
+        load_pipeline("ner", "no_such_model_installed")
+
+
+@pytest.mark.parametrize("profile, nlp, entities, sentences", [
+    ("sentences", lambda: load_pipeline("sentences"), False, True),
+    ("tokens", lambda: load_pipeline("tokens"), False, False),
+    ("ner", _ner_profile, True, False),
+    ("ner", _ner_profile, True, True),
+])
+def test_profiles_are_left_untouched(profile, nlp, entities, sentences):
+    nlp = nlp()
+    assert profile_for(entities, sentences) == profile
+    names = list(nlp.pipe_names)
+    # The pipeline is shared by stage threads, so it must not be modified
+    with select_pipes(nlp, entities, sentences) as selected:
+        assert selected is nlp
+        assert nlp.pipe_names == names
+        assert nlp.disabled == []
+        doc = nlp("I saw Paris. It was nice.")
+    assert nlp.pipe_names == names
+    if sentences:
+        assert len(list(doc.sents)) == 2
+    if entities:
+        assert [ent.text for ent in doc.ents] == ["Paris"]
+
+
+def _full_pipeline():
+    import spacy
+
+    nlp = spacy.blank("en")
+    for name in ("tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer"):
+        nlp.add_pipe(name, config={"mode": "lookup"} if name == "lemmatizer" else {})
+    # A token pattern, since phrase patterns would run the untrained components
+    nlp.add_pipe("entity_ruler").add_patterns([{"label": "GPE", "pattern": [{"TEXT": "Paris"}]}])
+    return nlp
+
+
+@pytest.mark.parametrize("entities, sentences, expected", [
+    (True, True, ["entity_ruler", "parser"]),
+    (True, False, ["entity_ruler"]),
+    (False, True, ["parser"]),
+    (False, False, []),
+])
+def test_needed_pipes_on_a_full_pipeline(entities, sentences, expected):
+    assert needed_pipes(_full_pipeline(), entities, sentences) == expected
+
+
+def test_select_pipes_restores_a_full_pipeline():
+    nlp = _full_pipeline()
+    names = list(nlp.pipe_names)
+    with select_pipes(nlp, entities=True, sentences=False):
+        assert nlp.pipe_names == ["entity_ruler"]
+        # The untrained components are never run
+        assert [ent.text for ent in nlp("Off to Paris.").ents] == ["Paris"]
+    assert nlp.pipe_names == names
+    assert nlp.disabled == []
+
+    with pytest.raises(RuntimeError):
+        with select_pipes(nlp, entities=True, sentences=False):
+            raise RuntimeError("stage failed")
+    assert nlp.pipe_names == names
+    assert nlp.disabled == []
+
+
+def test_sentencizer_is_preferred_for_sentences():
+    nlp = _full_pipeline()
+    nlp.add_pipe("sentencizer", first=True)
+    assert needed_pipes(nlp, entities=False, sentences=True) == ["sentencizer"]
+    # and it is kept even when sentences aren't needed
+    assert needed_pipes(nlp, entities=True, sentences=False) == ["entity_ruler", "sentencizer"]
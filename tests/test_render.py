@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+from omnitext.cache import ResultCache
+from omnitext.render import entity_html, entity_pages
+
+
+class RecordingCache:
+    """Records what each render is keyed on, and renders every time."""
+
+    def __init__(self):
+        self.payloads = []
+
+    def get_or_compute(self, stage, text, compute, **settings):
+        self.payloads.append(json.loads(text))
+        return compute()
+
+
+def _page_ents(text, spans, start, end):
+    cache = RecordingCache()
+    entity_html(text, spans, start, end, cache=cache)
+    page, ents = cache.payloads[0]
+    assert page == text[start:end]
+    return [(page[e["start"]:e["end"]], e["label"]) for e in ents]
+
+
+@pytest.mark.parametrize("page_chars", [7, 40, 100, 5000])
+def test_pages_join_back_into_the_text(page_chars):
+    text = "First paragraph here.\n\nA second one, with two sentences. Here is the other.\n\nLast."
+    pages = entity_pages(text, page_chars)
+    assert "".join(text[start:end] for start, end in pages) == text
+    assert all(end - start <= page_chars for start, end in pages)
+    assert [start for start, _ in pages[1:]] == [end for _, end in pages[:-1]]
+
+
+def test_empty_text_has_one_empty_page():
+    assert entity_pages("") == [(0, 0)]
+    assert _page_ents("", [], 0, 0) == []
+    assert "<div" in entity_html("", [], 0, 0)
+
+
+def test_entity_crossing_a_page_boundary_is_split():
+    text = "Yesterday Alice Moreno met Harbor Electronics in Paris."
+    spans = [(10, 22, "PERSON"), (27, 45, "ORG"), (49, 54, "GPE")]
+    cut = text.index("Moreno")
+    assert _page_ents(text, spans, 0, cut) == [("Alice ", "PERSON")]
+    assert _page_ents(text, spans, cut, len(text)) == [
+        ("Moreno", "PERSON"), ("Harbor Electronics", "ORG"), ("Paris", "GPE"),
+    ]
+    # A page inside one entity, and a page between entities
+    assert _page_ents(text, spans, 30, 35) == [("bor E", "ORG")]
+    assert _page_ents(text, spans, 22, 27) == []
+
+
+def test_every_entity_is_on_some_page():
+    # No sentence ends, so pages are cut at spaces, some inside "Alice Moreno"
+    text = " ".join(f"item {i} mentions Alice Moreno and Paris" for i in range(50))
+    spans = []
+    for name, label in (("Alice Moreno", "PERSON"), ("Paris", "GPE")):
+        start = text.find(name)
+        while start != -1:
+            spans.append((start, start + len(name), label))
+            start = text.find(name, start + 1)
+    spans.sort()
+    found = []
+    for start, end in entity_pages(text, 97):
+        found.extend(_page_ents(text, spans, start, end))
+    assert len(found) > len(spans)  # some entities do straddle pages
+    # Pieces of an entity split over two pages join back together
+    joined = []
+    for piece, label in found:
+        if joined and joined[-1][1] == label and not joined[-1][0].endswith(("Moreno", "Paris")):
+            joined[-1] = (joined[-1][0] + piece, label)
+        else:
+            joined.append((piece, label))
+    assert joined == [(text[s:e], label) for s, e, label in spans]
+
+
+def test_identical_pages_are_rendered_once(monkeypatch):
+    from spacy import displacy
+
+    calls = []
+    render = displacy.render
+    monkeypatch.setattr(displacy, "render", lambda *args, **kwargs: calls.append(1) or render(*args, **kwargs))
+    cache = ResultCache()
+    spans = [(0, 5, "GPE")]
+    first = entity_html("Paris is lovely.", spans, 0, 16, cache=cache)
+    # Same page content at another offset of another text
+    again = entity_html("Well. Paris is lovely.", [(6, 11, "GPE")], 6, 22, cache=cache)
+    assert first == again
+    assert len(calls) == 1
+    entity_html("Paris is lovely.", [(0, 5, "LOC")], 0, 16, cache=cache)
+    assert len(calls) == 2
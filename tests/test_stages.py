@@ -0,0 +1,108 @@
+import threading
+
+import pytest
+
+from omnitext.analysis import AnalyzedText
+from omnitext.stages import Cancelled, StageRun, make_executor
+
+
+def test_results_arrive_as_stages_finish():
+    release = threading.Event()
+    with StageRun(max_workers=2) as run:
+        run.submit("slow", release.wait, 5)
+        run.submit("fast", lambda: "done")
+        results = run.results(poll=0.05)
+        assert next(results)[:2] == ("fast", "done")
+        release.set()
+        assert next(results)[:2] == ("slow", True)
+
+
+def test_chained_stages_wait_without_a_thread():
+    executor = make_executor(2)
+    release = threading.Event()
+    started = []
+    with StageRun(executor=executor) as run:
+        run.submit("parse", release.wait, 5)
+        for name in ("entities", "words", "summary", "sentiment"):
+            run.submit(name, lambda name=name: started.append(name) or name, after="parse")
+        # The second thread is still free while the parse runs
+        assert executor.submit(lambda: "free").result(timeout=2) == "free"
+        assert started == []
+        release.set()
+        names = [name for name, _, error in run.results(poll=0.05) if error is None]
+    assert sorted(names) == ["entities", "parse", "sentiment", "summary", "words"]
+    assert sorted(started) == ["entities", "sentiment", "summary", "words"]
+    executor.shutdown()
+
+
+def test_failed_dependency_fails_chained_stages():
+    def parse():
+        raise ValueError("bad text")
+
+    with StageRun() as run:
+        run.submit("parse", parse)
+        run.submit("words", lambda: "never", after="parse")
+        errors = {name: error for name, _, error in run.results(poll=0.05)}
+    assert isinstance(errors["words"], ValueError)
+    assert errors["words"] is errors["parse"]
+
+
+def test_cancel_stops_chained_stages():
+    release = threading.Event()
+    started = []
+    with StageRun() as run:
+        run.submit("parse", release.wait, 5)
+        run.submit("words", lambda: started.append("words"), after="parse")
+        run.cancel()
+        release.set()
+    # Leaving the block waited for the parse; the chained stage never ran
+    assert started == []
+    with pytest.raises(Cancelled):
+        run.check()
+
+
+class BlockingCache:
+    """A result cache whose lookups wait until released."""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def get_or_compute(self, stage, text, compute, **settings):
+        self.started.set()
+        self.release.wait(5)
+        return compute()
+
+
+def test_stage_locks_are_per_instance(nlp):
+    cache = BlockingCache()
+    busy = AnalyzedText(nlp, "A long text that takes a while.", cache=cache)
+    thread = threading.Thread(target=lambda: busy.words)
+    thread.start()
+    assert cache.started.wait(5)
+
+    # Another session's analysis doesn't wait for the busy one
+    done = threading.Event()
+    other = AnalyzedText(nlp, "Another text.")
+    threading.Thread(target=lambda: other.words and done.set()).start()
+    assert done.wait(2)
+
+    cache.release.set()
+    thread.join()
+
+
+def test_stages_share_one_parse(nlp):
+    analyzed = AnalyzedText(nlp, "Alice Moreno went to Paris. It was a good trip.")
+    parse = analyzed._parse
+    calls = []
+    analyzed._parse = lambda: calls.append(1) or parse()
+    readers = [
+        threading.Thread(target=lambda name=name: getattr(analyzed, name))
+        for name in ("entities", "entity_spans", "words", "sentiment") * 3
+    ]
+    for thread in readers:
+        thread.start()
+    for thread in readers:
+        thread.join()
+    assert calls == [1]
+    assert analyzed.load().words["Alice"] == 1
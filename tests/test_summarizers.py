@@ -0,0 +1,35 @@
+import os
+
+import pytest
+
+from omnitext.analysis import sentence_words, summarize_sentences
+from omnitext.summarizers import SUMMARIZERS
+
+
+ARTICLES = os.path.join(os.path.dirname(__file__), os.pardir, "benchmarks", "fixtures", "articles.txt")
+
+with open(ARTICLES, encoding="utf-8") as f:
+    _PARAGRAPHS = [p for p in f.read().split("\n\n") if len(p) > 200]
+
+TEXTS = {
+    "empty": "",
+    "one sentence": "Just one sentence about the city council.",
+    "stop words": "It is what it is. And so on. Was it?",
+    "numbers": "1999. 2001 and 42. 3.14!",
+    "mixed": "It is what it is. The council approved the transit plan. And so on. "
+             "Residents worried about construction noise near the new transit lines.",
+    # Sentences with exactly equal scores are avoided: sumy breaks such ties
+    # by floating point noise, the built-in engine by document order
+    "article": _PARAGRAPHS[1] + " " + _PARAGRAPHS[2],
+    "articles": " ".join(_PARAGRAPHS),
+}
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning", "ignore::UserWarning")
+@pytest.mark.parametrize("summarizer", SUMMARIZERS)
+@pytest.mark.parametrize("name", list(TEXTS))
+def test_builtin_engine_matches_sumy(nlp, summarizer, name):
+    sentences = sentence_words(nlp(TEXTS[name]))
+    for count in (1, 2, 3):
+        expected = summarize_sentences(sentences, summarizer, count, engine="sumy")
+        assert summarize_sentences(sentences, summarizer, count, engine="builtin") == expected